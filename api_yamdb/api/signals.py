@@ -0,0 +1,59 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from reviews import signals as reviews_signals
+from reviews.models import GenreTitle, Review, Title, User
+
+from .v1.authentication import invalidate_user
+from .v1.cache import CACHE_DEPENDENCIES, invalidate
+from .v1.indexes import TITLE_PREFIXES
+
+
+# reviews.signals импортирован выше, чтобы рейтинг обновлялся раньше,
+# чем сбрасывается кеш: получатели вызываются в порядке подключения.
+
+
+def model_changed(sender, **kwargs):
+    # Версии меняются после коммита транзакции записи (см. invalidate).
+    invalidate(*CACHE_DEPENDENCIES[sender])
+
+
+for model in CACHE_DEPENDENCIES:
+    post_save.connect(model_changed, sender=model)
+    post_delete.connect(model_changed, sender=model)
+# Жанры произведения меняются через genre.set(), минуя post_save.
+m2m_changed.connect(model_changed, sender=GenreTitle)
+# Импорт csv пишет bulk_create, минуя post_save.
+reviews_signals.csv_imported.connect(model_changed)
+
+
+def title_saved(sender, instance, **kwargs):
+    TITLE_PREFIXES.title_saved(instance)
+
+
+def title_deleted(sender, instance, **kwargs):
+    TITLE_PREFIXES.title_deleted(instance)
+
+
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        TITLE_PREFIXES.review_count_changed(instance.title_id, 1)
+
+
+def review_deleted(sender, instance, **kwargs):
+    TITLE_PREFIXES.review_count_changed(instance.title_id, -1)
+
+
+# Подключаются после model_changed: индекс применяет изменение после
+# того, как эта же запись сменила версию (см. PrefixIndex.update).
+post_save.connect(title_saved, sender=Title)
+post_delete.connect(title_deleted, sender=Title)
+post_save.connect(review_saved, sender=Review)
+post_delete.connect(review_deleted, sender=Review)
+
+
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+post_save.connect(user_changed, sender=User)
+post_delete.connect(user_changed, sender=User)
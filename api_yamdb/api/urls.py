@@ -1,15 +1,16 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .v1.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, TitleViewSet, UserViewSet, get_token,
-                       signup_new_user)
+from .v1.views import (CategoryViewSet, CommentViewSet, ExportViewSet,
+                       GenreViewSet, ReviewViewSet, TitleViewSet, UserViewSet,
+                       get_token, signup_new_user)
 
 router_v1 = routers.DefaultRouter()
 router_v1.register("categories", CategoryViewSet)
 router_v1.register("genres", GenreViewSet)
 router_v1.register("titles", TitleViewSet)
 router_v1.register("users", UserViewSet)
+router_v1.register("export", ExportViewSet, basename="export")
 router_v1.register(
     r"titles/(?P<title_id>\d+)/reviews", ReviewViewSet, basename="reviews"
 )
@@ -0,0 +1,87 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import get_version, invalidate
+
+
+def user_namespace(user_id):
+    return f"user:{user_id}"
+
+
+def invalidate_user(user_id):
+    invalidate(user_namespace(user_id))
+
+
+def access_token_for(user):
+    """JWT с ролью и username пользователя в дополнительных полях."""
+    token = AccessToken.for_user(user)
+    token["username"] = user.username
+    token["role"] = user.role
+    return token
+
+
+class UserSnapshots:
+    """Ограниченный LRU-кеш пользователей процесса: id -> (версия, user).
+
+    Снимок старше max_age секунд загружается заново: если кеш версий
+    не общий для процессов (locmem), смена роли или удаление в другом
+    процессе станут видны не позже чем через max_age.
+    """
+
+    def __init__(self, max_size, max_age):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None or item[0] != version:
+                return None
+            if time.monotonic() - item[1] > self.max_age:
+                del self._items[user_id]
+                return None
+            self._items.move_to_end(user_id)
+            return item[2]
+
+    def put(self, user_id, version, user):
+        with self._lock:
+            self._items[user_id] = (version, time.monotonic(), user)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+USER_SNAPSHOTS = UserSnapshots(
+    settings.USER_CACHE_SIZE, settings.USER_CACHE_MAX_AGE
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, которая берет пользователя из USER_SNAPSHOTS.
+
+    Снимок действителен, пока не сменилась версия пользователя в общем
+    кеше и не истек USER_CACHE_MAX_AGE. Версию сбрасывают сигналы
+    сохранения и удаления User: при общем кеше смена роли или удаление
+    видны сразу во всех процессах, при locmem - через USER_CACHE_MAX_AGE.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        version = get_version(user_namespace(user_id))
+        user = USER_SNAPSHOTS.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            USER_SNAPSHOTS.put(user_id, version, user)
+        # Копия, чтобы изменения в запросе не попали в общий снимок.
+        return copy.copy(user)
@@ -0,0 +1,121 @@
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+# Какие закешированные ответы устаревают при изменении модели.
+# Рейтинг хранится в Title, поэтому отзывы сбрасывают и "titles".
+# "title_names" и "title_facets" - версии индексов в памяти (indexes.py).
+# Отзывы и комментарии показывают username автора.
+CACHE_DEPENDENCIES = {
+    Category: ("categories", "titles", "title_facets"),
+    Genre: ("genres", "titles", "title_facets"),
+    GenreTitle: ("titles", "title_facets"),
+    Title: ("titles", "reviews", "comments", "title_names", "title_facets"),
+    Review: ("titles", "reviews", "comments"),
+    Comment: ("comments",),
+    User: ("reviews", "comments"),
+}
+
+
+def version_key(namespace):
+    return f"api:{namespace}:version"
+
+
+def get_version(namespace):
+    version = cache.get(version_key(namespace))
+    if version is None:
+        # add() не перезапишет версию, выставленную другим процессом.
+        cache.add(version_key(namespace), uuid.uuid4().hex, None)
+        version = cache.get(version_key(namespace))
+    return version
+
+
+def invalidate(*namespaces):
+    """Меняет версию пространств имен, старые ответы больше не читаются.
+
+    Версия меняется после коммита транзакции: иначе другое соединение
+    успело бы перестроить данные до коммита и сохранить их под новой
+    версией. Вне транзакции версия меняется сразу.
+    """
+    transaction.on_commit(lambda: bump_versions(namespaces))
+
+
+# Последняя смена версии в этом потоке: пространство -> (старая, новая).
+_bumps = threading.local()
+
+
+def bump_versions(namespaces):
+    for namespace in namespaces:
+        old = cache.get(version_key(namespace))
+        new = uuid.uuid4().hex
+        cache.set(version_key(namespace), new, None)
+        vars(_bumps)[namespace] = (old, new)
+
+
+def last_bump(namespace):
+    """(старая, новая) версия последней смены в этом потоке или None."""
+    return vars(_bumps).get(namespace)
+
+
+def response_cache_key(namespace, request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"api:{namespace}:{get_version(namespace)}:{path}"
+
+
+class CachedResponseMixin:
+    """Кеширует успешные GET-ответы по пути с query string.
+
+    Ключ включает версию cache_namespace, которую сбрасывают сигналы
+    сохранения и удаления моделей (см. api.signals). Из ключа же
+    строится ETag: на совпавший If-None-Match отвечаем 304, не
+    обращаясь ни к базе, ни к сериализатору.
+    """
+
+    cache_namespace = None
+
+    def cached_response(
+        self, action, request, *args, cache_namespace=None, **kwargs
+    ):
+        key = response_cache_key(
+            cache_namespace or self.cache_namespace, request
+        )
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        # ETag выдается только ответам 200, поэтому совпадение значит, что
+        # ответ с этим ключом уже был успешным. "*" так не проверить без
+        # выполнения запроса, и он обрабатывается как обычный GET.
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH", "")
+        if etag in parse_etags(if_none_match):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = action(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response["ETag"] = etag
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
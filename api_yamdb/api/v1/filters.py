@@ -1,6 +1,10 @@
 import django_filters
+from rest_framework.filters import BaseFilterBackend
+
+from .indexes import filter_by_ids
 
 from reviews.models import Title  # isort:skip
+from reviews.search import search_titles  # isort:skip
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -15,3 +19,32 @@ class TitleFilter(django_filters.FilterSet):
     class Meta:
         model = Title
         fields = ["category", "genre", "name", "year"]
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск ?search= по названию и описанию.
+
+    Если у view search_rank ложно, результат не сортируется по
+    релевантности и годится для подзапроса.
+    """
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        rank = getattr(view, "search_rank", True)
+        return search_titles(queryset, query, rank=rank)
+
+
+class TrigramSearchFilter(BaseFilterBackend):
+    """Нечеткий поиск ?q= с опечатками по триграммному индексу view."""
+
+    search_param = "q"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        return filter_by_ids(queryset, view.trigram_index.search(query))
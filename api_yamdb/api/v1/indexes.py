@@ -0,0 +1,403 @@
+import bisect
+import heapq
+import threading
+import time
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, IntegerField, When
+from reviews.models import Category, Genre, GenreTitle, Title
+
+from .cache import get_version, last_bump
+
+
+class VersionedIndex:
+    """Индекс в памяти процесса, перестраиваемый при смене версии.
+
+    Версия берется из общего кеша по cache_namespace (см. cache.py), ее
+    сбрасывают сигналы моделей, поэтому изменения в одном процессе
+    доходят до индексов во всех остальных. Записи в обход сигналов
+    (bulk_create, другой процесс при несвязанном locmem-кеше) версию
+    не меняют, поэтому индекс старше API_INDEX_MAX_AGE секунд тоже
+    перестраивается. Строится лениво.
+    """
+
+    cache_namespace = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = None
+        self._built_at = 0
+
+    @property
+    def max_age(self):
+        return settings.API_INDEX_MAX_AGE
+
+    def build(self):
+        raise NotImplementedError
+
+    def is_current(self, version):
+        return (
+            self._version == version
+            and time.monotonic() - self._built_at <= self.max_age
+        )
+
+    def get(self):
+        version = get_version(self.cache_namespace)
+        if not self.is_current(version):
+            with self._lock:
+                if not self.is_current(version):
+                    self._rebuild(version)
+        return self._data
+
+    def refresh(self):
+        """Перестраивает индекс сразу, не дожидаясь смены версии."""
+        version = get_version(self.cache_namespace)
+        with self._lock:
+            self._rebuild(version)
+            return self._data
+
+    def _rebuild(self, version):
+        self._data = self.build()
+        self._version = version
+        self._built_at = time.monotonic()
+
+
+class CatalogIndex(VersionedIndex):
+    """Снимок маленькой справочной таблицы: категорий или жанров.
+
+    Таблицы почти не меняются, поэтому список, поиск и вложенные
+    объекты произведений берутся из памяти процесса без запросов.
+    """
+
+    def __init__(self, model, cache_namespace):
+        super().__init__()
+        self.model = model
+        self.cache_namespace = cache_namespace
+
+    def build(self):
+        objects = list(self.model.objects.order_by("id"))
+        return {
+            "objects": objects,
+            "by_id": {item.id: item for item in objects},
+        }
+
+    def search(self, terms):
+        """Объекты, в названии которых есть все слова, как в SearchFilter
+        с icontains, но без учета регистра и для кириллицы."""
+        terms = [term.lower() for term in terms]
+        return [
+            item
+            for item in self.get()["objects"]
+            if all(term in item.name.lower() for term in terms)
+        ]
+
+
+def trigrams(text):
+    """Триграммы слов строки, как в pg_trgm: слова дополняются пробелами."""
+    result = set()
+    for word in text.lower().split():
+        word = f"  {word} "
+        result.update(word[i:i + 3] for i in range(len(word) - 2))
+    return result
+
+
+class TrigramIndex(VersionedIndex):
+    """Нечеткий поиск по полю модели: триграмма -> множество id."""
+
+    similarity_threshold = 0.3
+    limit = 50
+
+    def __init__(self, model, field, cache_namespace):
+        super().__init__()
+        self.model = model
+        self.field = field
+        self.cache_namespace = cache_namespace
+
+    def build(self):
+        postings = defaultdict(set)
+        sizes = {}
+        rows = self.model.objects.values_list("id", self.field).iterator()
+        for pk, text in rows:
+            grams = trigrams(text)
+            sizes[pk] = len(grams)
+            for gram in grams:
+                postings[gram].add(pk)
+        return postings, sizes
+
+    def search(self, query):
+        """Возвращает id, отсортированные по убыванию похожести."""
+        postings, sizes = self.get()
+        grams = trigrams(query)
+        shared = Counter()
+        for gram in grams:
+            shared.update(postings.get(gram, ()))
+        scored = []
+        for pk, common in shared.items():
+            similarity = common / (len(grams) + sizes[pk] - common)
+            if similarity >= self.similarity_threshold:
+                scored.append((similarity, pk))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [pk for _, pk in scored[:self.limit]]
+
+
+def normalize_name(name):
+    return " ".join(name.lower().replace("ё", "е").split())
+
+
+class PrefixIndex(VersionedIndex):
+    """Автодополнение названий произведений.
+
+    Хранит отсортированный список пар (нормализованное название, id):
+    диапазон названий с заданным префиксом находится бисекцией. Сигналы
+    сохранения и удаления обновляют список в этом процессе на месте,
+    остальные процессы перестраивают его по смене версии "title_names".
+    Число отзывов берется из Title.rating_count и в других процессах
+    обновляется только при перестройке.
+    """
+
+    cache_namespace = "title_names"
+    # Короткие префиксы покрывают большие диапазоны: их ответы
+    # запоминаются до следующего изменения индекса.
+    memo_prefix_length = 3
+
+    def build(self):
+        entries, names, counts = [], {}, {}
+        rows = Title.objects.values_list("id", "name", "rating_count")
+        for pk, name, count in rows.iterator():
+            entries.append((normalize_name(name), pk))
+            names[pk] = name
+            counts[pk] = count
+        entries.sort()
+        return {"entries": entries, "names": names, "counts": counts}
+
+    def complete(self, prefix, limit):
+        """Возвращает [(id, название)] с префиксом, популярные первыми."""
+        prefix = normalize_name(prefix)
+        data = self.get()
+        memo = data.setdefault("memo", {})
+        if (prefix, limit) in memo:
+            return memo[prefix, limit]
+        entries, counts = data["entries"], data["counts"]
+        start = bisect.bisect_left(entries, (prefix,))
+        end = bisect.bisect_left(entries, (prefix + "\uffff",), start)
+        top = heapq.nlargest(
+            limit,
+            (pk for _, pk in entries[start:end]),
+            key=lambda pk: (counts[pk], -pk),
+        )
+        result = [(pk, data["names"][pk]) for pk in top]
+        if len(prefix) <= self.memo_prefix_length:
+            memo[prefix, limit] = result
+        return result
+
+    def update(self, change, bumped=True):
+        """Применяет изменение к уже построенному индексу процесса.
+
+        Изменение применяется после коммита и только если индекс был
+        актуален до этой записи. Иначе в нем не хватает изменений из
+        других процессов, и он перестраивается заново. bumped - меняет
+        ли запись версию "title_names" (отзывы ее не меняют).
+        """
+        transaction.on_commit(lambda: self._apply(change, bumped))
+
+    def _apply(self, change, bumped):
+        if bumped:
+            # Получатель подключен после model_changed, поэтому версия
+            # к этому моменту уже сменена этой же записью.
+            previous, current = last_bump(self.cache_namespace) or (None, None)
+        else:
+            previous = current = get_version(self.cache_namespace)
+        with self._lock:
+            if self._data is None:
+                return
+            if self._version != previous:
+                self._data = None
+                self._version = None
+                return
+            change(self._data)
+            self._data.pop("memo", None)
+            self._version = current
+
+    def title_saved(self, title):
+        def change(data):
+            self._remove(data, title.pk)
+            entry = (normalize_name(title.name), title.pk)
+            bisect.insort(data["entries"], entry)
+            data["names"][title.pk] = title.name
+            data["counts"].setdefault(title.pk, title.rating_count)
+
+        self.update(change)
+
+    def title_deleted(self, title):
+        def change(data):
+            self._remove(data, title.pk)
+            data["counts"].pop(title.pk, None)
+
+        self.update(change)
+
+    def review_count_changed(self, title_id, delta):
+        def change(data):
+            if title_id in data["counts"]:
+                data["counts"][title_id] += delta
+
+        self.update(change, bumped=False)
+
+    def _remove(self, data, pk):
+        if pk not in data["names"]:
+            return
+        entry = (normalize_name(data["names"].pop(pk)), pk)
+        position = bisect.bisect_left(data["entries"], entry)
+        if data["entries"][position:position + 1] == [entry]:
+            del data["entries"][position]
+
+
+def bitset(ids):
+    """Собирает множество id в целое число: бит с номером id равен 1."""
+    ids = list(ids)
+    bits = bytearray(max(ids, default=0) // 8 + 1)
+    for pk in ids:
+        bits[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(bits, "little")
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def iter_bits(mask):
+    """Номера единичных битов по возрастанию."""
+    bits = bin(mask)[:1:-1]
+    position = bits.find("1")
+    while position != -1:
+        yield position
+        position = bits.find("1", position + 1)
+
+
+class BitsetResult:
+    """Выборка произведений, заданная битовой маской id.
+
+    Подходит для Paginator: count() считается по маске, а база
+    запрашивается только за объектами текущей страницы.
+    """
+
+    def __init__(self, mask, queryset):
+        self.mask = mask
+        self.queryset = queryset
+
+    def count(self):
+        return popcount(self.mask)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        ids = list(islice(iter_bits(self.mask), key.start, key.stop))
+        titles = self.queryset.in_bulk(ids)
+        return [titles[pk] for pk in ids if pk in titles]
+
+
+class FacetIndex(VersionedIndex):
+    """Битовые маски id произведений по жанру, категории и году.
+
+    Сочетание фильтров считается побитовым AND без join-ов в базе.
+    """
+
+    cache_namespace = "title_facets"
+    facets = ("category", "genre", "year")
+
+    def build(self):
+        ids = defaultdict(list)
+        titles = Title.objects.values_list("id", "category__slug", "year")
+        for pk, category, year in titles.iterator():
+            ids["all", None].append(pk)
+            ids["category", category].append(pk)
+            ids["year", year].append(pk)
+        genres = GenreTitle.objects.filter(
+            title__isnull=False, genre__isnull=False
+        ).values_list("title_id", "genre__slug")
+        for pk, genre in genres.iterator():
+            ids["genre", genre].append(pk)
+        return {
+            "masks": {key: bitset(values) for key, values in ids.items()},
+            "names": {
+                "category": dict(Category.objects.values_list("slug", "name")),
+                "genre": dict(Genre.objects.values_list("slug", "name")),
+            },
+        }
+
+    def select(self, params):
+        """Маска произведений под фильтры запроса или None, если в
+        запросе есть параметры, которые индекс не обслуживает."""
+        if set(params) - set(self.facets) - {"page"}:
+            return None
+        masks = self.get()["masks"]
+        result = masks.get(("all", None), 0)
+        for facet in self.facets:
+            # Пустое значение не фильтрует, как и в CharFilter.
+            value = params.get(facet, "")
+            if value == "":
+                continue
+            if facet == "year":
+                try:
+                    value = int(value)
+                except ValueError:
+                    return None
+            result &= masks.get((facet, value), 0)
+        return result
+
+    def filter(self, queryset, params):
+        if not any(facet in params for facet in self.facets):
+            return None
+        mask = self.select(params)
+        if mask is None:
+            return None
+        return BitsetResult(mask, queryset)
+
+    def counts(self, mask):
+        """Количество произведений выборки по каждому значению фильтров."""
+        data = self.get()
+        result = {facet: [] for facet in self.facets}
+        for (facet, value), facet_mask in data["masks"].items():
+            if facet == "all" or value is None:
+                continue
+            count = popcount(facet_mask & mask)
+            if not count:
+                continue
+            if facet == "year":
+                result[facet].append({"year": value, "count": count})
+            else:
+                result[facet].append({
+                    "slug": value,
+                    "name": data["names"][facet].get(value),
+                    "count": count,
+                })
+        for values in result.values():
+            values.sort(key=lambda item: -item["count"])
+        return {"count": popcount(mask), **result}
+
+
+def filter_by_ids(queryset, ids):
+    """Оставляет объекты с данными id в порядке списка."""
+    ordering = Case(
+        *[When(id=pk, then=position) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(id__in=ids).order_by(ordering)
+
+
+CATEGORIES = CatalogIndex(Category, "categories")
+GENRES = CatalogIndex(Genre, "genres")
+CATEGORY_NAMES = TrigramIndex(Category, "name", "categories")
+GENRE_NAMES = TrigramIndex(Genre, "name", "genres")
+TITLE_NAMES = TrigramIndex(Title, "name", "title_names")
+TITLE_PREFIXES = PrefixIndex()
+TITLE_FACETS = FacetIndex()
@@ -0,0 +1,37 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PubDateCursorPagination(CursorPagination):
+    ordering = ("-pub_date", "-id")
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """Постраничная пагинация с переходом на курсорную по запросу.
+
+    Клиент включает курсорный режим параметром ?cursor= (пустым для
+    первой страницы). Курсор ищет страницу по индексу pub_date и не
+    считает COUNT(*), поэтому глубина прокрутки не влияет на время ответа.
+    """
+
+    cursor_pagination_class = PubDateCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_pagination_class.cursor_query_param in (
+            request.query_params
+        ):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
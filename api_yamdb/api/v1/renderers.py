@@ -0,0 +1,61 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class RowRenderer(BaseRenderer):
+    """Рендерер выгрузок: строки отдаются по одной через stream().
+
+    render() нужен для обычных ответов, например ошибок доступа: объект
+    превращается в одну строку выгрузки.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows else []
+        return "".join(self.stream(rows, fields)).encode(self.charset)
+
+    def stream(self, rows, fields):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(RowRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def stream(self, rows, fields):
+        for row in rows:
+            yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + "\n"
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def csv_value(value):
+    """Вложенные объекты (жанры, категория) выгружаются своими slug."""
+    if isinstance(value, dict):
+        return value.get("slug", "")
+    if isinstance(value, list):
+        return ",".join(str(csv_value(item)) for item in value)
+    if value is None:
+        return ""
+    return value
+
+
+class CSVRenderer(RowRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def stream(self, rows, fields):
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(csv_value(row.get(name)) for name in fields)
@@ -1,18 +1,126 @@
+from django.conf import settings
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Value, prefetch_related_objects
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from rest_framework.validators import (UniqueTogetherValidator,
+                                       UniqueValidator)
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
 
+from .cache import CACHE_DEPENDENCIES, invalidate
+from .indexes import CATEGORIES, GENRES
 from .utils import CurrentTitleDefault
 
+USERNAME_TAKEN = "Пользователь с таким username — {username} — уже существует."
+EMAIL_TAKEN = "Пользователь с таким Email — {email} — уже существует."
 
-class CategorySerializer(serializers.ModelSerializer):
+
+def users_with_lower(field, value):
+    """Пользователи, у которых lower(field) совпадает с lower(value);
+    запрос идет по индексу reviews_user_<field>_lower_uniq."""
+    return User.objects.annotate(lowered=Lower(field)).filter(
+        lowered=Lower(Value(value))
+    )
+
+
+def validate_not_me(value):
+    if value.lower() == "me":
+        raise serializers.ValidationError(
+            'Пользователя с username="me" создавать нельзя.'
+        )
+
+
+class DatabaseUniqueMixin:
+    """Уникальность проверяет база данных, а не лишний SELECT.
+
+    Валидаторы UniqueValidator и UniqueTogetherValidator снимаются с
+    сериализатора и запускаются только после IntegrityError, чтобы
+    вернуть тот же ответ 400, что и при обычной валидации.
+    """
+
+    unique_validators = (UniqueValidator, UniqueTogetherValidator)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self.deferred_field_validators = {}
+        for name, field in fields.items():
+            deferred = [
+                validator
+                for validator in field.validators
+                if isinstance(validator, self.unique_validators)
+            ]
+            if deferred:
+                field.validators = [
+                    validator
+                    for validator in field.validators
+                    if validator not in deferred
+                ]
+                self.deferred_field_validators[name] = deferred
+        return fields
+
+    def get_validators(self):
+        validators = super().get_validators()
+        self.deferred_validators = [
+            validator
+            for validator in validators
+            if isinstance(validator, self.unique_validators)
+        ]
+        return [
+            validator
+            for validator in validators
+            if validator not in self.deferred_validators
+        ]
+
+    def create(self, validated_data):
+        return self.save_unique(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self.save_unique(
+            lambda data: super(DatabaseUniqueMixin, self).update(
+                instance, data
+            ),
+            validated_data,
+        )
+
+    def save_unique(self, save, validated_data):
+        try:
+            with transaction.atomic():
+                return save(validated_data)
+        except IntegrityError:
+            self.raise_unique_errors(validated_data)
+            raise
+
+    def raise_unique_errors(self, validated_data):
+        """Повторяет отложенные проверки, чтобы объяснить нарушение."""
+        for name, validators in self.deferred_field_validators.items():
+            field = self.fields[name]
+            if field.source not in validated_data:
+                continue
+            for validator in validators:
+                try:
+                    validator(validated_data[field.source], field)
+                except serializers.ValidationError as exc:
+                    raise serializers.ValidationError({name: exc.detail})
+        for validator in self.deferred_validators:
+            try:
+                validator(validated_data, self)
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError(
+                    serializers.as_serializer_error(exc)
+                )
+
+
+class CategorySerializer(DatabaseUniqueMixin, serializers.ModelSerializer):
     class Meta:
         exclude = ("id",)
         model = Category
         lookup_field = "slug"
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(DatabaseUniqueMixin, serializers.ModelSerializer):
     class Meta:
         exclude = ("id",)
         model = Genre
@@ -20,26 +128,238 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class TitleReadSerializer(serializers.ModelSerializer):
+    """Жанры и категория берутся из снимков справочников по id, поэтому
+    queryset должен подгружать только genretitle_set."""
+
     rating = serializers.IntegerField(read_only=True)
-    genre = GenreSerializer(many=True, read_only=True)
-    category = CategorySerializer(read_only=True)
+    genre = serializers.SerializerMethodField()
+    category = serializers.SerializerMethodField()
 
     class Meta:
-        fields = "__all__"
+        fields = (
+            "id",
+            "name",
+            "year",
+            "rating",
+            "description",
+            "genre",
+            "category",
+        )
         model = Title
 
+    @cached_property
+    def catalogs(self):
+        """Снимки справочников один раз на сериализацию: при many=True
+        дочерний сериализатор общий для всех произведений."""
+        return {GENRES: GENRES.get(), CATEGORIES: CATEGORIES.get()}
 
-class TitleWriteSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
-        slug_field="slug", many=True, queryset=Genre.objects.all()
+    def from_catalog(self, catalog, pk):
+        if pk is None:
+            return None
+        snapshot = self.catalogs[catalog]
+        item = snapshot["by_id"].get(pk)
+        if item is None and not snapshot.get("refreshed"):
+            # Объект записан в обход сигналов: перестраиваем снимок
+            # один раз за сериализацию.
+            snapshot = dict(catalog.refresh(), refreshed=True)
+            self.catalogs[catalog] = snapshot
+            item = snapshot["by_id"].get(pk)
+        return item
+
+    def get_genre(self, title):
+        genres = [
+            self.from_catalog(GENRES, link.genre_id)
+            for link in title.genretitle_set.all()
+        ]
+        return GenreSerializer(
+            [genre for genre in genres if genre is not None], many=True
+        ).data
+
+    def get_category(self, title):
+        category = self.from_catalog(CATEGORIES, title.category_id)
+        if category is None:
+            return None
+        return CategorySerializer(category).data
+
+
+class SlugListField(serializers.ListField):
+    """Список slug, который разрешается одним запросом slug__in.
+
+    В отличие от SlugRelatedField(many=True) не делает запрос на каждый
+    slug и сообщает обо всех неизвестных slug сразу. Если в known
+    заранее загружен словарь {slug: объект}, база не запрашивается.
+    """
+
+    default_error_messages = {
+        "does_not_exist": "Не найдены объекты со slug: {slugs}.",
+    }
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        self.known = None
+        super().__init__(child=serializers.SlugField(), **kwargs)
+
+    def to_internal_value(self, data):
+        slugs = list(dict.fromkeys(super().to_internal_value(data)))
+        found = self.known
+        if found is None:
+            found = self.queryset.in_bulk(slugs, field_name="slug")
+        missing = [slug for slug in slugs if slug not in found]
+        if missing:
+            self.fail("does_not_exist", slugs=", ".join(missing))
+        return [found[slug] for slug in slugs]
+
+    def to_representation(self, value):
+        if hasattr(value, "all"):
+            value = value.all()
+        return [item.slug for item in value]
+
+
+class KnownSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который сначала ищет объект в словаре known."""
+
+    def __init__(self, **kwargs):
+        self.known = None
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if self.known is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, str) or data not in self.known:
+            self.fail(
+                "does_not_exist", slug_name=self.slug_field, value=data
+            )
+        return self.known[data]
+
+
+def bulk_create_with_ids(model, objects, batch_size):
+    """bulk_create, после которого у объектов заполнен pk.
+
+    SQLite не возвращает id из INSERT со многими строками. Вызывается
+    внутри транзакции: после первой вставки запись в базу для других
+    соединений заблокирована, а AUTOINCREMENT выдает id по возрастанию,
+    поэтому последние len(objects) id принадлежат вставленным строкам.
+    """
+    model.objects.bulk_create(objects, batch_size=batch_size)
+    if objects and objects[0].pk is None:
+        ids = model.objects.order_by("-id").values_list("id", flat=True)
+        for item, pk in zip(objects, reversed(ids[:len(objects)])):
+            item.pk = pk
+    return objects
+
+
+class TitleListSerializer(serializers.ListSerializer):
+    """Создание произведений пачкой: все slug жанров и категорий
+    загружаются двумя запросами, строки пишутся bulk_create."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.load_known_slugs(data)
+        return super().to_internal_value(data)
+
+    def load_known_slugs(self, data):
+        items = [item for item in data if isinstance(item, dict)]
+        genres = {
+            slug
+            for item in items
+            if isinstance(item.get("genre"), list)
+            for slug in item["genre"]
+            if isinstance(slug, str)
+        }
+        categories = {
+            item["category"]
+            for item in items
+            if isinstance(item.get("category"), str)
+        }
+        fields = self.child.fields
+        fields["genre"].known = Genre.objects.in_bulk(
+            genres, field_name="slug"
+        )
+        fields["category"].known = Category.objects.in_bulk(
+            categories, field_name="slug"
+        )
+
+    @transaction.atomic
+    def create(self, validated_data):
+        batch_size = settings.TITLE_BULK_BATCH_SIZE
+        genres = [item.pop("genre") for item in validated_data]
+        titles = bulk_create_with_ids(
+            Title, [Title(**item) for item in validated_data], batch_size
+        )
+        GenreTitle.objects.bulk_create(
+            (
+                GenreTitle(title=title, genre=genre)
+                for title, title_genres in zip(titles, genres)
+                for genre in title_genres
+            ),
+            batch_size=batch_size,
+        )
+        # bulk_create не отправляет сигналы, кеш сбрасываем сами.
+        invalidate(
+            *set(CACHE_DEPENDENCIES[Title] + CACHE_DEPENDENCIES[GenreTitle])
+        )
+        prefetch_related_objects(titles, "genre")
+        return titles
+
+
+def replace_genres(title, genres, created=False):
+    """Записывает жанры произведения одним bulk_create.
+
+    Для нового произведения старых связей нет, и их не читаем. Сигнал
+    m2m_changed при этом не отправляется, поэтому кеш сбрасываем сами.
+    """
+    wanted = {genre.id for genre in genres}
+    existing = set()
+    if not created:
+        existing = set(
+            GenreTitle.objects.filter(title=title).values_list(
+                "genre_id", flat=True
+            )
+        )
+        if existing - wanted:
+            GenreTitle.objects.filter(
+                title=title, genre_id__in=existing - wanted
+            ).delete()
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre_id=genre_id)
+        for genre_id in wanted - existing
     )
-    category = serializers.SlugRelatedField(
+    if wanted != existing:
+        invalidate(*CACHE_DEPENDENCIES[GenreTitle])
+
+
+class TitleWriteSerializer(serializers.ModelSerializer):
+    genre = SlugListField(queryset=Genre.objects.all())
+    category = KnownSlugRelatedField(
         slug_field="slug", queryset=Category.objects.all()
     )
 
     class Meta:
-        fields = "__all__"
+        fields = ("id", "name", "year", "description", "genre", "category")
         model = Title
+        list_serializer_class = TitleListSerializer
+
+    @transaction.atomic
+    def create(self, validated_data):
+        genres = validated_data.pop("genre")
+        title = super().create(validated_data)
+        replace_genres(title, genres, created=True)
+        return title
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        genres = validated_data.pop("genre", None)
+        title = super().update(instance, validated_data)
+        if genres is not None:
+            replace_genres(title, genres)
+        return title
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    prefix = serializers.CharField(required=False, allow_blank=True)
+    limit = serializers.IntegerField(
+        required=False, default=10, min_value=1, max_value=50
+    )
 
 
 class UserCreationSerializer(serializers.ModelSerializer):
@@ -57,30 +377,70 @@ class UserCreationSerializer(serializers.ModelSerializer):
             "role",
         )
 
+    def others_with_lower(self, field, value):
+        """Совпадения без учета регистра, кроме редактируемого
+        пользователя: свое же значение в PATCH не считается занятым."""
+        users = users_with_lower(field, value)
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        return users
+
     def validate_username(self, value):
         """Проверяем, что нельзя создать пользователя с username = "me"
         и, что нельзя создать с одинаковым username."""
-        username = value.lower()
-        if username == "me":
+        validate_not_me(value)
+        if self.others_with_lower("username", value).exists():
             raise serializers.ValidationError(
-                'Пользователя с username="me" создавать нельзя.'
-            )
-        if User.objects.filter(username=username).exists():
-            raise serializers.ValidationError(
-                f"Пользователь с таким username — {username} — уже существует."
+                USERNAME_TAKEN.format(username=value.lower())
             )
         return value
 
     def validate_email(self, value):
         """Проверяем, что нельзя создать пользователя с одинаковым email."""
-        email = value.lower()
-        if User.objects.filter(email=email).exists():
+        if self.others_with_lower("email", value).exists():
             raise serializers.ValidationError(
-                f"Пользователь с таким Email — {email} — уже существует."
+                EMAIL_TAKEN.format(email=value.lower())
             )
         return value
 
 
+class SignupSerializer(serializers.Serializer):
+    """Регистрация одним INSERT: уникальность без учета регистра
+    проверяют индексы по lower(username) и lower(email)."""
+
+    username = serializers.CharField(
+        max_length=150, validators=[UnicodeUsernameValidator()]
+    )
+    email = serializers.EmailField(max_length=254)
+
+    def validate_username(self, value):
+        validate_not_me(value)
+        return value
+
+    def create(self, validated_data):
+        username = validated_data["username"]
+        email = validated_data["email"]
+        try:
+            with transaction.atomic():
+                return User.objects.create(username=username, email=email)
+        except IntegrityError:
+            pass
+        # Повторный запрос кода уже зарегистрированным пользователем.
+        errors = {}
+        for user in users_with_lower("username", username).union(
+            users_with_lower("email", email)
+        ):
+            if user.username == username and user.email == email:
+                return user
+            if user.username.lower() == username.lower():
+                errors["username"] = [
+                    USERNAME_TAKEN.format(username=username.lower())
+                ]
+            if user.email.lower() == email.lower():
+                errors["email"] = [EMAIL_TAKEN.format(email=email.lower())]
+        raise serializers.ValidationError(errors)
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -92,7 +452,7 @@ class AuthTokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(max_length=50)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DatabaseUniqueMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         default=serializers.CurrentUserDefault(),
         read_only=True,
@@ -123,3 +483,21 @@ class CommentSerializer(serializers.ModelSerializer):
             "author",
             "pub_date",
         ]
+
+
+class ReviewExportSerializer(ReviewSerializer):
+    """Поля ReviewSerializer и id произведения для выгрузки."""
+
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        validators = []
+
+
+class CommentExportSerializer(CommentSerializer):
+    """Поля CommentSerializer и id отзыва для выгрузки."""
+
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ["review"]
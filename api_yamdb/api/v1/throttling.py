@@ -0,0 +1,35 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle, UserRateThrottle
+
+
+class IPRateThrottle(SimpleRateThrottle):
+    """Ограничение по IP для любых запросов, в том числе с токеном."""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class SignupRateThrottle(IPRateThrottle):
+    """Отправка кода подтверждения: ограничение по IP."""
+
+    scope = "signup"
+
+
+class TokenRateThrottle(IPRateThrottle):
+    """Подбор кода подтверждения: ограничение по IP."""
+
+    scope = "token"
+
+
+class WriteRateThrottle(UserRateThrottle):
+    """Создание и изменение отзывов и комментариев: по пользователю."""
+
+    scope = "write"
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
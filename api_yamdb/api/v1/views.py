@@ -1,34 +1,66 @@
+from itertools import islice
+
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import (filters, mixins, permissions, serializers, status,
-                            viewsets)
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework import filters, mixins, permissions, status, viewsets
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
-from api_yamdb.settings import EMAIL_ADMIN
+from reviews.outbox import queue_email
 
-from .filters import TitleFilter  # isort:skip
+from .authentication import access_token_for  # isort:skip
+from .cache import CachedListMixin, CachedRetrieveMixin  # isort:skip
+from .filters import (  # isort:skip
+    TitleFilter,
+    TitleSearchFilter,
+    TrigramSearchFilter,
+)
+from .indexes import (  # isort:skip
+    CATEGORIES,
+    CATEGORY_NAMES,
+    GENRE_NAMES,
+    GENRES,
+    TITLE_FACETS,
+    TITLE_NAMES,
+    TITLE_PREFIXES,
+    bitset,
+)
+from .pagination import PageNumberOrCursorPagination  # isort:skip
+from .parsers import NDJSONParser  # isort:skip
 from .permissions import (  # isort:skip
     IsAdminOrReadOnly,
     IsAuthorModeratorAdminPermission,
     IsStaffAdminPermission,
 )
+from .renderers import CSVRenderer, NDJSONRenderer  # isort:skip
 from .serializers import (  # isort:skip
     CategorySerializer,
+    CommentExportSerializer,
     CommentSerializer,
     GenreSerializer,
+    ReviewExportSerializer,
     ReviewSerializer,
+    SignupSerializer,
     TitleReadSerializer,
     TitleWriteSerializer,
     AuthTokenSerializer,
+    AutocompleteSerializer,
     UserCreationSerializer,
 )
+from .throttling import (  # isort:skip
+    SignupRateThrottle,
+    TokenRateThrottle,
+    WriteRateThrottle,
+)
 
 
 class CDLViewSet(
@@ -44,35 +76,208 @@ class CDLViewSet(
     pass
 
 
-class CategoryViewSet(CDLViewSet):
-    queryset = Category.objects.all()
-    serializer_class = CategorySerializer
+class CatalogViewSet(CachedListMixin, CDLViewSet):
+    """Категории и жанры: список и поиск отдаются из снимка в памяти."""
+
+    catalog = None
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (filters.SearchFilter, TrigramSearchFilter)
     search_fields = ("name",)
     lookup_field = "slug"
 
+    def filter_queryset(self, queryset):
+        if self.action != "list":
+            return super().filter_queryset(queryset)
+        terms = filters.SearchFilter().get_search_terms(self.request)
+        items = self.catalog.search(terms)
+        query = self.request.query_params.get(
+            TrigramSearchFilter.search_param, ""
+        ).strip()
+        if query:
+            ranks = {
+                pk: position
+                for position, pk in enumerate(self.trigram_index.search(query))
+            }
+            items = sorted(
+                (item for item in items if item.id in ranks),
+                key=lambda item: ranks[item.id],
+            )
+        return items
+
 
-class GenreViewSet(CDLViewSet):
+class CategoryViewSet(CatalogViewSet):
+    cache_namespace = "categories"
+    queryset = Category.objects.all()
+    serializer_class = CategorySerializer
+    catalog = CATEGORIES
+    trigram_index = CATEGORY_NAMES
+
+
+class GenreViewSet(CatalogViewSet):
+    cache_namespace = "genres"
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
-    permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ("name",)
-    lookup_field = "slug"
+    catalog = GENRES
+    trigram_index = GENRE_NAMES
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg("reviews__score"))
+class TitleViewSet(
+    CachedListMixin, CachedRetrieveMixin, viewsets.ModelViewSet
+):
+    cache_namespace = "titles"
+    # Категории и жанры подставляются из снимков CATEGORIES и GENRES,
+    # из базы читаются только связи с жанрами, без join-ов.
+    queryset = Title.objects.prefetch_related("genretitle_set")
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (
+        DjangoFilterBackend,
+        TitleSearchFilter,
+        TrigramSearchFilter,
+    )
     filterset_class = TitleFilter
+    trigram_index = TITLE_NAMES
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
             return TitleReadSerializer
         return TitleWriteSerializer
 
+    def filter_queryset(self, queryset):
+        # Только жанр, категория и год: отвечаем по битовому индексу.
+        if self.action == "list":
+            result = TITLE_FACETS.filter(queryset, self.request.query_params)
+            if result is not None:
+                return result
+        return super().filter_queryset(queryset)
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        parser_classes=(JSONParser, NDJSONParser),
+    )
+    def bulk(self, request):
+        """Создание произведений пачкой из JSON-массива или NDJSON.
+
+        Все произведения пишутся в одной транзакции. При ошибках ничего
+        не создается, а ответ 400 содержит ошибки каждого элемента в
+        порядке запроса.
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["GET"])
+    def facets(self, request):
+        """Количество произведений по жанрам, категориям и годам
+        для тех же фильтров, что и у списка."""
+        return self.cached_response(
+            self.facet_counts, request, cache_namespace="title_facets"
+        )
+
+    def facet_counts(self, request):
+        mask = TITLE_FACETS.select(request.query_params)
+        if mask is None:
+            titles = self.filter_queryset(Title.objects.all()).order_by()
+            mask = bitset(titles.values_list("id", flat=True).iterator())
+        return Response(TITLE_FACETS.counts(mask))
+
+    @action(detail=False, methods=["GET"])
+    def autocomplete(self, request):
+        """Названия с префиксом ?prefix=, по убыванию числа отзывов."""
+        serializer = AutocompleteSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        prefix = serializer.validated_data.get("prefix", "")
+        if not prefix:
+            return Response([])
+        titles = TITLE_PREFIXES.complete(
+            prefix, serializer.validated_data["limit"]
+        )
+        return Response([{"id": pk, "name": name} for pk, name in titles])
+
+
+class ExportViewSet(viewsets.GenericViewSet):
+    """Потоковые выгрузки для администраторов в NDJSON или CSV.
+
+    Формат выбирается заголовком Accept или ?format=ndjson|csv. Отзывы
+    и комментарии выгружаются для произведений, отобранных теми же
+    фильтрами, что и /titles/. Строки читаются из базы итератором
+    пачками по EXPORT_CHUNK_SIZE, поэтому память процесса не растет
+    с размером выгрузки.
+    """
+
+    permission_classes = (IsStaffAdminPermission,)
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
+    filterset_class = TitleFilter
+    queryset = Title.objects.all()
+
+    @property
+    def search_rank(self):
+        # Отзывы и комментарии фильтруются подзапросом по произведениям.
+        return self.action == "titles"
+
+    def titles_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def stream(self, queryset, serializer_class, prefetch=()):
+        renderer = self.request.accepted_renderer
+        fields = list(serializer_class().fields)
+        # Пачка сериализуется целиком: снимки справочников и другие
+        # общие данные сериализатора берутся один раз на пачку.
+        rows = (
+            row
+            for chunk in iter_chunks(queryset, prefetch)
+            for row in serializer_class(chunk, many=True).data
+        )
+        response = StreamingHttpResponse(
+            renderer.stream(rows, fields),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.action}.{renderer.format}"'
+        )
+        return response
+
+    @action(detail=False)
+    def titles(self, request):
+        return self.stream(
+            self.titles_queryset(),
+            TitleReadSerializer,
+            prefetch=("genretitle_set",),
+        )
+
+    @action(detail=False)
+    def reviews(self, request):
+        return self.stream(
+            Review.objects.filter(
+                title__in=self.titles_queryset().values("id")
+            ).select_related("author").order_by("id"),
+            ReviewExportSerializer,
+        )
+
+    @action(detail=False)
+    def comments(self, request):
+        return self.stream(
+            Comment.objects.filter(
+                review__title__in=self.titles_queryset().values("id")
+            ).select_related("author").order_by("id"),
+            CommentExportSerializer,
+        )
+
+
+def iter_chunks(queryset, prefetch=()):
+    """Объекты queryset пачками; iterator() не выполняет
+    prefetch_related, поэтому связи подгружаются для каждой пачки."""
+    rows = queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, settings.EXPORT_CHUNK_SIZE))
+        if not chunk:
+            return
+        if prefetch:
+            prefetch_related_objects(chunk, *prefetch)
+        yield chunk
+
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -101,22 +306,19 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([SignupRateThrottle])
 def signup_new_user(request):
-    serializer = UserCreationSerializer(data=request.data)
+    serializer = SignupSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
+    user = serializer.save()
+    email = user.email
 
-    email = serializer.data["email"]
-    username = serializer.data["username"]
-
-    user, _ = User.objects.get_or_create(email=email, username=username)
     confirmation_code = default_token_generator.make_token(user)
 
-    send_mail(
+    queue_email(
+        email,
         "Код подтверждения",
         f"Ваш код подтверждения: {confirmation_code}",
-        EMAIL_ADMIN,
-        [email],
-        fail_silently=False,
     )
 
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -124,6 +326,7 @@ def signup_new_user(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([TokenRateThrottle])
 def get_token(request):
     serializer = AuthTokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -136,7 +339,7 @@ def get_token(request):
             "Пользователь не найден", status=status.HTTP_404_NOT_FOUND
         )
     if default_token_generator.check_token(user, confirmation_code):
-        token = AccessToken.for_user(user)
+        token = access_token_for(user)
         return Response({"token": str(token)}, status=status.HTTP_200_OK)
     return Response(
         {"confirmation_code": "Неверный код подтверждения"},
@@ -144,44 +347,61 @@ def get_token(request):
     )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    CachedListMixin, CachedRetrieveMixin, viewsets.ModelViewSet
+):
+    cache_namespace = "reviews"
     serializer_class = ReviewSerializer
+    pagination_class = PageNumberOrCursorPagination
+    throttle_classes = (WriteRateThrottle,)
     permission_classes = [
         IsAuthorModeratorAdminPermission,
         permissions.IsAuthenticatedOrReadOnly,
     ]
 
+    @cached_property
+    def title(self):
+        """Произведение из url, загружается один раз за запрос."""
+        return get_object_or_404(Title, id=self.kwargs["title_id"])
+
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs["title_id"])
-        return Review.objects.filter(title=title)
+        return Review.objects.filter(title=self.title).select_related(
+            "author"
+        )
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs["title_id"])
-        if title and serializer.is_valid:
-            review = Review.objects.filter(
-                title=title, author=self.request.user
-            )
-            if len(review) == 0:
-                serializer.save(author=self.request.user, title=title)
-            else:
-                raise serializers.ValidationError("Ревью уже существует")
+        serializer.save(author=self.request.user, title=self.title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    CachedListMixin, CachedRetrieveMixin, viewsets.ModelViewSet
+):
+    cache_namespace = "comments"
     serializer_class = CommentSerializer
+    pagination_class = PageNumberOrCursorPagination
+    throttle_classes = (WriteRateThrottle,)
     permission_classes = [
         IsAuthorModeratorAdminPermission,
         permissions.IsAuthenticatedOrReadOnly,
     ]
 
+    @cached_property
+    def review(self):
+        """Отзыв из url, принадлежащий произведению из url."""
+        return get_object_or_404(
+            Review,
+            id=self.kwargs["review_id"],
+            title_id=self.kwargs["title_id"],
+        )
+
     def get_queryset(self):
-        review = get_object_or_404(Review, id=self.kwargs["review_id"])
-        return Comment.objects.filter(review=review)
+        return Comment.objects.filter(review=self.review).select_related(
+            "author"
+        )
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs["review_id"])
         if serializer.is_valid:
-            serializer.save(author=self.request.user, review=review)
+            serializer.save(author=self.request.user, review=self.review)
 
     def perform_destroy(self, instance):
         instance.delete()
@@ -70,6 +70,24 @@ DATABASES = {
 }
 
 
+# Cache
+# Для нескольких процессов замените backend на общий: файловый,
+# memcached или Redis, иначе сброс кеша не дойдет до других воркеров.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "api_yamdb",
+    }
+}
+
+# Время жизни закешированных ответов API, в секундах.
+API_CACHE_TIMEOUT = 60
+# Индексы в памяти процесса (api/v1/indexes.py) старше стольких секунд
+# перестраиваются, даже если версия в кеше не менялась.
+API_INDEX_MAX_AGE = 300
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -114,12 +132,24 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.v1.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 5,
+    # Счетчики хранятся в кеше default, общем для всех процессов,
+    # если CACHES настроен на общий backend.
+    "DEFAULT_THROTTLE_RATES": {
+        "signup": "10/hour",
+        "token": "30/hour",
+        "write": "60/min",
+    },
 }
 
+# Сколько пользователей держит в памяти процесса CachedJWTAuthentication.
+USER_CACHE_SIZE = 1024
+# Через сколько секунд снимок пользователя загружается из базы заново.
+USER_CACHE_MAX_AGE = 30
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
@@ -130,3 +160,13 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 EMAIL_ADMIN = "Admin@ya.ru"
+
+# Письма отправляет команда process_outbox; после стольких неудачных
+# попыток письмо остается в очереди с сохраненной ошибкой.
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+# По столько строк за один INSERT пишет POST /api/v1/titles/bulk/.
+TITLE_BULK_BATCH_SIZE = 500
+
+# Столько строк за раз читают из базы выгрузки /api/v1/export/.
+EXPORT_CHUNK_SIZE = 2000
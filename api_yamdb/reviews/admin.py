@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (Category, Comment, Genre, OutgoingEmail, Review, Title,
+                     User)
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -11,9 +12,16 @@ class UserAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ("email", "subject", "created", "sent", "attempts")
+    list_filter = ("sent",)
+    search_fields = ("email",)
+
+
 admin.site.register(Category)
 admin.site.register(Comment)
 admin.site.register(Genre)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
 admin.site.register(Review)
 admin.site.register(Title)
 admin.site.register(User, UserAdmin)
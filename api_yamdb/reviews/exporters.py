@@ -0,0 +1,87 @@
+import csv
+import time
+from datetime import datetime
+
+from .importers import CSV_FILES, DEFAULT_CHUNK_SIZE, open_csv
+from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+
+USER_FIELDS = (
+    "id", "username", "email", "role", "bio", "first_name", "last_name",
+)
+# Хеш пароля и флаги доступа идут последними: их нет в static/data.
+USER_ACCOUNT_FIELDS = ("password", "is_staff", "is_superuser", "is_active")
+SLUG_FIELDS = ("id", "name", "slug")
+
+# Модель: (заголовок файла, поля values_list в порядке колонок). Колонки
+# совпадают с теми, что читают функции build_* из importers.py.
+CSV_COLUMNS = {
+    User: (
+        USER_FIELDS + USER_ACCOUNT_FIELDS,
+        USER_FIELDS + USER_ACCOUNT_FIELDS,
+    ),
+    Category: (SLUG_FIELDS, SLUG_FIELDS),
+    Genre: (SLUG_FIELDS, SLUG_FIELDS),
+    Title: (
+        ("id", "name", "year", "category", "description"),
+        ("id", "name", "year", "category_id", "description"),
+    ),
+    GenreTitle: (
+        ("id", "title_id", "genre_id"),
+        ("id", "title_id", "genre_id"),
+    ),
+    Review: (
+        ("id", "title_id", "text", "author", "score", "pub_date"),
+        ("id", "title_id", "text", "author_id", "score", "pub_date"),
+    ),
+    Comment: (
+        ("id", "review_id", "text", "author", "pub_date"),
+        ("id", "review_id", "text", "author_id", "pub_date"),
+    ),
+}
+
+
+def csv_value(value):
+    """Значение в том виде, в каком оно лежит в static/data."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    return value
+
+
+def export_queryset(model):
+    queryset = model.objects.order_by("id")
+    if model is GenreTitle:
+        # Связи без жанра или произведения импорт все равно пропустит.
+        queryset = queryset.filter(title__isnull=False, genre__isnull=False)
+    return queryset
+
+
+def export_file_name(model, compress=False):
+    return CSV_FILES[model] + (".gz" if compress else "")
+
+
+def export_csv(model, file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Потоково выгружает модель в csv-файл в формате import_csv.
+
+    Строки читаются итератором по chunk_size, поэтому объекты моделей
+    не создаются и память не растет с размером таблицы. Файл с
+    расширением .gz сжимается. Возвращает количество строк.
+    """
+    header, fields = CSV_COLUMNS[model]
+    rows = export_queryset(model).values_list(*fields)
+    written = 0
+    started = time.monotonic()
+    print(f"Выполняется экспорт в {file_path}")
+    with open_csv(file_path, "w") as csv_file:
+        writer = csv.writer(csv_file, delimiter=",")
+        writer.writerow(header)
+        for row in rows.iterator(chunk_size=chunk_size):
+            writer.writerow([csv_value(value) for value in row])
+            written += 1
+    elapsed = time.monotonic() - started or 1e-9
+    print(
+        f"Экспорт модели {model.__name__} завершен: {written} строк, "
+        f"{written / elapsed:.0f} строк/с"
+    )
+    return written
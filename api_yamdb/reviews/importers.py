@@ -0,0 +1,223 @@
+import csv
+import gzip
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .ratings import recalculate_ratings
+from .signals import csv_imported
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def build_category(row, known):
+    return Category(id=row[0], name=row[1], slug=row[2])
+
+
+def build_comment(row, known):
+    if int(row[1]) not in known[Review] or int(row[3]) not in known[User]:
+        return None
+    return Comment(
+        id=row[0], review_id=row[1], text=row[2], author_id=row[3],
+        pub_date=row[4],
+    )
+
+
+def build_genre(row, known):
+    return Genre(id=row[0], name=row[1], slug=row[2])
+
+
+def build_genre_title(row, known):
+    if int(row[1]) not in known[Title] or int(row[2]) not in known[Genre]:
+        return None
+    return GenreTitle(id=row[0], title_id=row[1], genre_id=row[2])
+
+
+def build_review(row, known):
+    if int(row[1]) not in known[Title] or int(row[3]) not in known[User]:
+        return None
+    return Review(
+        id=row[0], title_id=row[1], text=row[2], author_id=row[3],
+        score=row[4], pub_date=row[5],
+    )
+
+
+def build_title(row, known):
+    category_id = int(row[3]) if row[3] else None
+    if category_id not in known[Category]:
+        category_id = None
+    # Колонки description нет в static/data, ее пишет export_csv.
+    description = row[4] if len(row) > 4 else ""
+    return Title(
+        id=row[0], name=row[1], year=row[2], category_id=category_id,
+        description=description,
+    )
+
+
+def csv_bool(value):
+    return value in ("True", "true", "1")
+
+
+def build_user(row, known):
+    user = User(
+        id=row[0], username=row[1], email=row[2], role=row[3], bio=row[4],
+        first_name=row[5], last_name=row[6],
+    )
+    # Колонок учетной записи нет в static/data, их пишет export_csv.
+    if len(row) > 7:
+        user.password = row[7]
+        user.is_staff = csv_bool(row[8])
+        user.is_superuser = csv_bool(row[9])
+        user.is_active = csv_bool(row[10])
+    return user
+
+
+# Модель: (функция сборки объекта из строки, модели внешних ключей).
+ROW_BUILDERS = {
+    Category: (build_category, ()),
+    Comment: (build_comment, (Review, User)),
+    Genre: (build_genre, ()),
+    GenreTitle: (build_genre_title, (Title, Genre)),
+    Review: (build_review, (Title, User)),
+    Title: (build_title, (Category,)),
+    User: (build_user, ()),
+}
+
+
+# Файлы static/data, из которых import_all загружает модели.
+CSV_FILES = {
+    User: "users.csv",
+    Category: "category.csv",
+    Genre: "genre.csv",
+    Title: "titles.csv",
+    GenreTitle: "genre_title.csv",
+    Review: "review.csv",
+    Comment: "comments.csv",
+}
+
+
+def csv_path(data_dir, model):
+    """Путь к файлу модели в папке, сжатый .gz вариант тоже подходит."""
+    path = os.path.join(data_dir, CSV_FILES[model])
+    if not os.path.exists(path) and os.path.exists(f"{path}.gz"):
+        return f"{path}.gz"
+    return path
+
+
+def open_csv(file_path, mode="r"):
+    """Открывает csv-файл как текст, файлы .gz распаковываются на лету."""
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, f"{mode}t", encoding="utf-8", newline="")
+    return open(file_path, mode, encoding="utf-8", newline="")
+
+
+def import_stages():
+    """Раскладывает модели по этапам в порядке внешних ключей.
+
+    Модели одного этапа не зависят друг от друга и могут
+    загружаться параллельно.
+    """
+    done = set()
+    stages = []
+    while len(done) < len(ROW_BUILDERS):
+        stage = [
+            model
+            for model, (_, dependencies) in ROW_BUILDERS.items()
+            if model not in done and done.issuperset(dependencies)
+        ]
+        stages.append(sorted(stage, key=list(CSV_FILES).index))
+        done.update(stage)
+    return stages
+
+
+def load_ids(model):
+    return set(model.objects.values_list("id", flat=True).iterator())
+
+
+def load_known_ids(models, known=None):
+    """Дополняет словарь {модель: множество id} недостающими моделями."""
+    known = {} if known is None else known
+    for model in models:
+        if model not in known:
+            known[model] = load_ids(model)
+    return known
+
+
+@contextmanager
+def keep_csv_dates(model):
+    """Не дает auto_now_add затереть даты, пришедшие из файла."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now_add", False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def reset_sequences(model):
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def import_csv(model, file_path, chunk_size=DEFAULT_CHUNK_SIZE, known=None):
+    """Потоково загружает csv-файл в модель пачками по chunk_size строк.
+
+    Внешние ключи проверяются по заранее загруженным множествам id
+    (known), строки с неизвестными ссылками пропускаются. Каждая пачка
+    пишется одним bulk_create в отдельной транзакции. Строки, которые
+    уже есть в базе, bulk_create(ignore_conflicts=True) пропускает
+    молча, поэтому записанные строки считаются по разнице count().
+    Возвращает количество записанных и пропущенных строк.
+    """
+    build, dependencies = ROW_BUILDERS[model]
+    known = load_known_ids(dependencies, known)
+    attempted = skipped = 0
+    count_before = model.objects.count()
+    started = time.monotonic()
+    print(f"Выполняется импорт из {file_path}")
+    with open_csv(file_path) as csv_file:
+        reader = csv.reader(csv_file, delimiter=",")
+        next(reader, None)
+        with keep_csv_dates(model):
+            while True:
+                rows = list(islice(reader, chunk_size))
+                if not rows:
+                    break
+                objects = [build(row, known) for row in rows]
+                objects = [obj for obj in objects if obj is not None]
+                skipped += len(rows) - len(objects)
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        objects, batch_size=chunk_size, ignore_conflicts=True
+                    )
+                attempted += len(objects)
+                elapsed = time.monotonic() - started or 1e-9
+                print(
+                    f"{model.__name__}: отправлено {attempted} строк, "
+                    f"{attempted / elapsed:.0f} строк/с"
+                )
+    written = model.objects.count() - count_before
+    reset_sequences(model)
+    if model is Review:
+        recalculate_ratings()
+    csv_imported.send(sender=model)
+    elapsed = time.monotonic() - started or 1e-9
+    print(
+        f"Импорт в модель {model.__name__} завершен, "
+        f"записано строк: {written} ({written / elapsed:.0f} строк/с), "
+        f"уже были в базе: {attempted - written}, "
+        f"пропущено строк: {skipped}"
+    )
+    return written, skipped
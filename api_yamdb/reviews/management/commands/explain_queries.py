@@ -0,0 +1,244 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from reviews.importers import DEFAULT_CHUNK_SIZE
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+    User,
+)
+from reviews.ratings import recalculate_ratings
+from reviews.signals import csv_imported
+
+# Составные индексы из миграции 0011, которые сравнивает --compare.
+HOT_QUERY_INDEXES = (
+    "comment_review_pub_date_idx",
+    "genretitle_genre_title_idx",
+    "review_title_pub_date_idx",
+    "review_title_score_idx",
+    "title_category_year_idx",
+)
+SEED_USERS = 1000
+SEED_CATEGORIES = 10
+SEED_GENRES = 20
+GENRES_PER_TITLE = 2
+REVIEWS_PER_COMMENT = 10
+
+
+def hot_queries():
+    """Основные запросы API в том виде, в каком их строят представления."""
+    title = Title.objects.order_by("id").first()
+    review_id = Review.objects.values_list("id", flat=True).first() or 0
+    author_id = Review.objects.values_list("author_id", flat=True).first()
+    genre_id = GenreTitle.objects.values_list("genre_id", flat=True).first()
+    title_id = title.id if title else 0
+    return {
+        "Отзывы произведения": Review.objects.filter(
+            title_id=title_id
+        ).order_by("-pub_date", "-id")[:5],
+        "Комментарии к отзыву": Comment.objects.filter(
+            review_id=review_id
+        ).order_by("-pub_date", "-id")[:5],
+        "Произведения категории за год": Title.objects.filter(
+            category_id=title.category_id if title else None,
+            year=title.year if title else 0,
+        ),
+        "Произведения жанра": GenreTitle.objects.filter(
+            genre_id=genre_id
+        ).values("title_id"),
+        "Отзыв автора на произведение": Review.objects.filter(
+            author_id=author_id, title_id=title_id
+        ),
+        "Пересчет рейтинга": Review.objects.order_by()
+        .values("title_id")
+        .annotate(total=Sum("score"), count=Count("id")),
+    }
+
+
+def bulk_insert(model, objects, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Вставляет объекты из генератора пачками, не держа их все в памяти."""
+    while True:
+        chunk = list(islice(objects, chunk_size))
+        if not chunk:
+            return
+        model.objects.bulk_create(chunk)
+
+
+def seed(reviews, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Создает набор данных примерно с reviews отзывами.
+
+    Отзывы распределены по SEED_USERS авторам, каждый пишет не больше
+    одного отзыва на произведение, как требует unique_author_review.
+    Имена и slug получают метку запуска, поэтому команду можно
+    повторять на той же базе.
+    """
+    tag = uuid.uuid4().hex[:8]
+    rng = random.Random(tag)
+    now = timezone.now()
+    users_count = min(SEED_USERS, reviews) or 1
+    titles_count = -(-reviews // users_count)
+    started = time.monotonic()
+
+    bulk_insert(User, (
+        User(username=f"seed_{tag}_{i}", email=f"seed_{tag}_{i}@yamdb.fake")
+        for i in range(users_count)
+    ), chunk_size)
+    bulk_insert(Category, (
+        Category(name=f"Категория {i}", slug=f"seed-{tag}-{i}")
+        for i in range(SEED_CATEGORIES)
+    ), chunk_size)
+    bulk_insert(Genre, (
+        Genre(name=f"Жанр {i}", slug=f"seed-{tag}-{i}")
+        for i in range(SEED_GENRES)
+    ), chunk_size)
+    user_ids = list(User.objects.filter(
+        username__startswith=f"seed_{tag}_"
+    ).values_list("id", flat=True))
+    category_ids = list(Category.objects.filter(
+        slug__startswith=f"seed-{tag}-"
+    ).values_list("id", flat=True))
+    genre_ids = list(Genre.objects.filter(
+        slug__startswith=f"seed-{tag}-"
+    ).values_list("id", flat=True))
+
+    bulk_insert(Title, (
+        Title(
+            name=f"seed {tag} {i}",
+            year=rng.randint(1950, now.year),
+            category_id=rng.choice(category_ids),
+        )
+        for i in range(titles_count)
+    ), chunk_size)
+    title_ids = list(Title.objects.filter(
+        name__startswith=f"seed {tag} "
+    ).values_list("id", flat=True))
+    bulk_insert(GenreTitle, (
+        GenreTitle(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rng.sample(genre_ids, GENRES_PER_TITLE)
+    ), chunk_size)
+
+    bulk_insert(Review, islice((
+        Review(
+            title_id=title_id,
+            author_id=author_id,
+            text="Отзыв",
+            score=rng.randint(1, 10),
+            pub_date=now - timedelta(minutes=rng.randint(0, 10 ** 6)),
+        )
+        for title_id in title_ids
+        for author_id in user_ids
+    ), reviews), chunk_size)
+    review_ids = Review.objects.filter(
+        title__name__startswith=f"seed {tag} "
+    ).values_list("id", "author_id")[:reviews // REVIEWS_PER_COMMENT]
+    bulk_insert(Comment, (
+        Comment(
+            review_id=review_id,
+            author_id=author_id,
+            text="Комментарий",
+            pub_date=now - timedelta(minutes=rng.randint(0, 10 ** 6)),
+        )
+        for review_id, author_id in review_ids.iterator()
+    ), chunk_size)
+
+    recalculate_ratings()
+    # Запись шла в обход сигналов: сбрасываем кеши, как после импорта.
+    for model in (User, Category, Genre, Title, GenreTitle, Review, Comment):
+        csv_imported.send(sender=model)
+    return time.monotonic() - started
+
+
+def hot_query_indexes():
+    """Пары (модель, индекс) для индексов из HOT_QUERY_INDEXES."""
+    return [
+        (model, index)
+        for model in (Comment, GenreTitle, Review, Title)
+        for index in model._meta.indexes
+        if index.name in HOT_QUERY_INDEXES
+    ]
+
+
+def best_time(queryset, repeat):
+    """Лучшее из repeat выполнений запроса в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = "Показывает планы выполнения основных запросов API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Сколько отзывов создать перед замером, например 1000000",
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help=(
+                "Показать планы и время также без индексов миграции 0011; "
+                "индексы удаляются на время замера и создаются заново"
+            ),
+        )
+        parser.add_argument(
+            "-r",
+            "--repeat",
+            type=int,
+            default=5,
+            help="Сколько раз выполнять каждый запрос при замере",
+        )
+        parser.add_argument(
+            "-cs",
+            "--chunk_size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Количество строк, вставляемых за раз при --seed",
+        )
+
+    def handle(self, *args, **options):
+        if options["seed"] > 0:
+            elapsed = seed(options["seed"], options["chunk_size"])
+            print(
+                f"Создано {options['seed']} отзывов за {elapsed:.1f} с; "
+                f"всего отзывов: {Review.objects.count()}"
+            )
+        queries = hot_queries()
+        self.report("С индексами", queries, options["repeat"])
+        if not options["compare"]:
+            return
+        indexes = hot_query_indexes()
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+        try:
+            self.report("Без индексов", queries, options["repeat"])
+        finally:
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.add_index(model, index)
+
+    def report(self, header, queries, repeat):
+        print(f"=== {header} ===")
+        for name, queryset in queries.items():
+            print(f"{name}: {best_time(queryset, repeat):.2f} мс")
+            print(queryset.explain())
+            print()
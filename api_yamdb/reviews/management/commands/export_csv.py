@@ -0,0 +1,84 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from reviews.exporters import (  # isort:skip
+    CSV_COLUMNS,
+    DEFAULT_CHUNK_SIZE,
+    export_csv,
+    export_file_name,
+)
+
+
+def export_in_worker(model_label, file_path, chunk_size):
+    django.setup()
+    export_csv(apps.get_model(model_label), file_path, chunk_size=chunk_size)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает модели reviews в csv-файлы в формате static/data, "
+        "которые читает import_all"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-d",
+            "--data_dir",
+            type=str,
+            required=True,
+            help="Папка для csv-файлов",
+        )
+        parser.add_argument(
+            "-cs",
+            "--chunk_size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Количество строк, читаемых из базы за раз",
+        )
+        parser.add_argument(
+            "-z",
+            "--gzip",
+            action="store_true",
+            help="Сжимать файлы в .csv.gz",
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            help="Сколько моделей выгружать параллельно",
+        )
+
+    def handle(self, *args, **options):
+        data_dir = options["data_dir"]
+        chunk_size = options["chunk_size"]
+        os.makedirs(data_dir, exist_ok=True)
+        paths = {
+            model: os.path.join(
+                data_dir, export_file_name(model, options["gzip"])
+            )
+            for model in CSV_COLUMNS
+        }
+        if options["workers"] <= 1:
+            for model, file_path in paths.items():
+                export_csv(model, file_path, chunk_size=chunk_size)
+            return
+        # Модели выгружаются в разных транзакциях: строки со ссылками
+        # на объекты, созданные во время выгрузки, import_all пропустит.
+        # Дочерние процессы не должны наследовать открытое соединение.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = [
+                executor.submit(
+                    export_in_worker, model._meta.label, file_path, chunk_size
+                )
+                for model, file_path in paths.items()
+            ]
+            for future in futures:
+                future.result()
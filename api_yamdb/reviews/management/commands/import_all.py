@@ -0,0 +1,89 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from reviews.importers import (  # isort:skip
+    DEFAULT_CHUNK_SIZE,
+    csv_path,
+    import_csv,
+    import_stages,
+    load_ids,
+)
+
+
+def import_in_worker(model_label, file_path, chunk_size):
+    django.setup()
+    import_csv(apps.get_model(model_label), file_path, chunk_size=chunk_size)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Загружает все csv-файлы из static/data в порядке зависимостей"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-d",
+            "--data_dir",
+            type=str,
+            default=os.path.join(settings.BASE_DIR, "static/data"),
+            help="Папка с csv-файлами",
+        )
+        parser.add_argument(
+            "-cs",
+            "--chunk_size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Количество строк в одной пачке записи",
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            help="Сколько независимых моделей загружать параллельно",
+        )
+
+    def handle(self, *args, **options):
+        self.data_dir = options["data_dir"]
+        self.chunk_size = options["chunk_size"]
+        self.workers = options["workers"]
+        known = {}
+        for stage in import_stages():
+            if self.workers > 1 and len(stage) > 1:
+                self.import_parallel(stage)
+            else:
+                for model in stage:
+                    import_csv(
+                        model,
+                        self.file_path(model),
+                        chunk_size=self.chunk_size,
+                        known=known,
+                    )
+            # Один запрос на модель: дальше внешние ключи проверяются
+            # по этим множествам без обращения к базе.
+            for model in stage:
+                known[model] = load_ids(model)
+
+    def file_path(self, model):
+        return csv_path(self.data_dir, model)
+
+    def import_parallel(self, stage):
+        # Дочерние процессы не должны наследовать открытое соединение.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(
+                    import_in_worker,
+                    model._meta.label,
+                    self.file_path(model),
+                    self.chunk_size,
+                )
+                for model in stage
+            ]
+            for future in futures:
+                future.result()
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Отправляет письма из очереди исходящих"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-bs",
+            "--batch_size",
+            type=int,
+            default=100,
+            help="Сколько писем отправлять через одно соединение",
+        )
+        parser.add_argument(
+            "-ma",
+            "--max_attempts",
+            type=int,
+            default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            help="После скольких неудачных попыток письмо пропускается",
+        )
+        parser.add_argument(
+            "-i",
+            "--interval",
+            type=float,
+            default=0,
+            help="Проверять очередь каждые N секунд (по умолчанию один раз)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = process_outbox(
+                options["batch_size"], options["max_attempts"]
+            )
+            if sent:
+                print(f"Отправлено писем: {sent}")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
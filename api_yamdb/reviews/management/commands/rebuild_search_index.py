@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.search import is_supported, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Пересоздает полнотекстовый индекс произведений"
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError(
+                "Полнотекстовый индекс доступен только в SQLite"
+            )
+        rebuild_search_index()
+        print("Полнотекстовый индекс произведений перестроен")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.ratings import recalculate_ratings
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сохраненный рейтинг произведений по отзывам"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить рейтинг, ничего не исправляя",
+        )
+
+    def handle(self, *args, **options):
+        mismatched = recalculate_ratings(fix=not options["check"])
+        if not mismatched:
+            print("Рейтинг всех произведений актуален")
+        elif options["check"]:
+            raise CommandError(
+                f"Рейтинг устарел у произведений: {mismatched}"
+            )
+        else:
+            print(f"Рейтинг исправлен у {len(mismatched)} произведений")
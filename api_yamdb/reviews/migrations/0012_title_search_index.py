@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# SQL скопирован из reviews.search на момент миграции: дальнейшие
+# правки модуля не должны менять то, что делает эта миграция.
+INSTALL_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts USING fts5(
+        name, description, content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS reviews_title_fts_ai
+    AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS reviews_title_fts_ad
+    AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name,
+                                      description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS reviews_title_fts_au
+    AFTER UPDATE OF name, description ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name,
+                                      description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+]
+
+UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS reviews_title_fts_ai",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_ad",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_au",
+    "DROP TABLE IF EXISTS reviews_title_fts",
+]
+
+
+def execute_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            execute_on_sqlite(INSTALL_SQL), execute_on_sqlite(UNINSTALL_SQL)
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:00
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+LOWER_UNIQUE_INDEXES = {
+    'reviews_user_username_lower_uniq': 'username',
+    'reviews_user_email_lower_uniq': 'email',
+}
+
+
+def check_collisions(apps, schema_editor):
+    """Прежняя регистрация пропускала username и email, отличающиеся
+    только регистром. Такие записи не дадут создать индексы: их нужно
+    объединить или переименовать вручную до миграции."""
+    User = apps.get_model('reviews', 'User')
+    problems = []
+    for column in LOWER_UNIQUE_INDEXES.values():
+        duplicates = (
+            User.objects.annotate(lowered=Lower(column))
+            .values('lowered')
+            .annotate(total=Count('id'))
+            .filter(total__gt=1)
+            .values_list('lowered', flat=True)
+        )
+        for value in duplicates:
+            users = User.objects.annotate(lowered=Lower(column)).filter(
+                lowered=value
+            )
+            listed = ', '.join(
+                f'{user.id}:{getattr(user, column)}'
+                for user in users.order_by('id')
+            )
+            problems.append(f'{column} {value!r} - id пользователей {listed}')
+    if problems:
+        raise RuntimeError(
+            'Нельзя создать уникальные индексы без учета регистра, есть '
+            'совпадающие пользователи:\n' + '\n'.join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+    """Уникальность username и email без учета регистра.
+
+    Django 2.2 не умеет функциональные индексы в Meta.indexes,
+    поэтому создаем их через RunSQL.
+    """
+
+    dependencies = [
+        ('reviews', '0013_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_collisions, migrations.RunPython.noop),
+    ] + [
+        migrations.RunSQL(
+            sql=(
+                f'CREATE UNIQUE INDEX {name} '
+                f'ON reviews_user (lower({column}));'
+            ),
+            reverse_sql=f'DROP INDEX {name};',
+        )
+        for name, column in LOWER_UNIQUE_INDEXES.items()
+    ]
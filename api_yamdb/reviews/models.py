@@ -103,14 +103,32 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         related_name="titles",
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Сумма оценок"
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество оценок"
+    )
 
     class Meta:
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
+        indexes = [
+            models.Index(
+                fields=["category", "year"], name="title_category_year_idx"
+            )
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        """Средняя оценка, округленная вниз, или None без отзывов."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum // self.rating_count
+
 
 class GenreTitle(models.Model):
     genre = models.ForeignKey(
@@ -120,6 +138,13 @@ class GenreTitle(models.Model):
         Title, on_delete=models.SET_NULL, blank=True, null=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["genre", "title"], name="genretitle_genre_title_idx"
+            )
+        ]
+
     def __str__(self):
         return f"{self.title} {self.genre}"
 
@@ -153,11 +178,21 @@ class Review(models.Model):
         ordering = ["-pub_date"]
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
+        # Выборка (author, title) уже покрыта unique_author_review.
         constraints = [
             models.UniqueConstraint(
                 fields=["author", "title"], name="unique_author_review"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["title", "-pub_date", "-id"],
+                name="review_title_pub_date_idx",
+            ),
+            models.Index(
+                fields=["title", "score"], name="review_title_score_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title}, {self.score}, {self.author}"
@@ -185,6 +220,42 @@ class Comment(models.Model):
         ordering = ["-pub_date"]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(
+                fields=["review", "-pub_date", "-id"],
+                name="comment_review_pub_date_idx",
+            )
+        ]
 
     def __str__(self):
         return f"{self.author}, {self.pub_date}: {self.text}"
+
+
+class OutgoingEmail(models.Model):
+    email = models.EmailField(max_length=254, verbose_name="Получатель")
+    subject = models.CharField(max_length=255, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст")
+    created = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    sent = models.DateTimeField(
+        null=True, blank=True, db_index=True, verbose_name="Отправлено"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попыток отправки"
+    )
+    error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+
+    class Meta:
+        ordering = ["created"]
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        # Повторный код на тот же адрес заменяет еще не отправленный.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["email", "subject"],
+                condition=models.Q(sent__isnull=True),
+                name="unique_unsent_email",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.email}: {self.subject}"
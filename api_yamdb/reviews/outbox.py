@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def queue_email(email, subject, body):
+    """Ставит письмо в очередь; неотправленное письмо с той же темой
+    на тот же адрес заменяется новым."""
+    OutgoingEmail.objects.update_or_create(
+        email=email,
+        subject=subject,
+        sent=None,
+        defaults={"body": body, "attempts": 0, "error": ""},
+    )
+
+
+def pending_emails(max_attempts):
+    return OutgoingEmail.objects.filter(
+        sent__isnull=True, attempts__lt=max_attempts
+    )
+
+
+def record_failure(ids, error):
+    OutgoingEmail.objects.filter(id__in=ids).update(
+        attempts=F("attempts") + 1, error=str(error)
+    )
+
+
+def send_batch(emails):
+    """Отправляет письма через одно соединение с почтовым сервером.
+
+    Возвращает количество отправленных; ошибки сохраняются в письмах
+    для следующей попытки.
+    """
+    sent_ids = []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        record_failure([email.id for email in emails], error)
+        return 0
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                settings.EMAIL_ADMIN,
+                [email.email],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                record_failure([email.id], error)
+            else:
+                sent_ids.append(email.id)
+    finally:
+        connection.close()
+    OutgoingEmail.objects.filter(id__in=sent_ids).update(
+        sent=timezone.now(), attempts=F("attempts") + 1, error=""
+    )
+    return len(sent_ids)
+
+
+def process_outbox(batch_size, max_attempts):
+    """Отправляет все ожидающие письма пачками по batch_size."""
+    total = 0
+    last_id = 0
+    while True:
+        batch = list(
+            pending_emails(max_attempts)
+            .filter(id__gt=last_id)
+            .order_by("id")[:batch_size]
+        )
+        if not batch:
+            return total
+        total += send_batch(batch)
+        last_id = batch[-1].id
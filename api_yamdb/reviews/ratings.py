@@ -0,0 +1,52 @@
+from django.db.models import Count, F, Sum
+
+from .models import Review, Title
+
+
+def change_rating(title_id, score_delta, count_delta):
+    """Атомарно сдвигает сумму и количество оценок произведения."""
+    Title.objects.filter(id=title_id).update(
+        rating_sum=F("rating_sum") + score_delta,
+        rating_count=F("rating_count") + count_delta,
+    )
+
+
+def actual_ratings(**filters):
+    """Возвращает {title_id: (сумма, количество)} по таблице отзывов."""
+    rows = (
+        Review.objects.filter(**filters)
+        .order_by()
+        .values("title_id")
+        .annotate(total=Sum("score"), count=Count("id"))
+    )
+    return {row["title_id"]: (row["total"], row["count"]) for row in rows}
+
+
+def refresh_rating(title_id):
+    """Пересчитывает рейтинг одного произведения по его отзывам."""
+    rating_sum, rating_count = actual_ratings(title_id=title_id).get(
+        title_id, (0, 0)
+    )
+    Title.objects.filter(id=title_id).update(
+        rating_sum=rating_sum, rating_count=rating_count
+    )
+
+
+def recalculate_ratings(fix=True):
+    """Сверяет сохраненный рейтинг с отзывами.
+
+    Возвращает список id произведений, у которых значения расходились;
+    при fix=True эти значения исправляются.
+    """
+    actual = actual_ratings()
+    mismatched = []
+    stored = Title.objects.values_list("id", "rating_sum", "rating_count")
+    for title_id, rating_sum, rating_count in stored.iterator():
+        expected = actual.get(title_id, (0, 0))
+        if (rating_sum, rating_count) != expected:
+            mismatched.append(title_id)
+            if fix:
+                Title.objects.filter(id=title_id).update(
+                    rating_sum=expected[0], rating_count=expected[1]
+                )
+    return mismatched
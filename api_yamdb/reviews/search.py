@@ -0,0 +1,106 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+# Полнотекстовый индекс SQLite FTS5 по названию и описанию произведений.
+# Таблица хранит только индекс (content='reviews_title'), а триггеры
+# держат ее в актуальном состоянии при любой записи, включая bulk_create.
+FTS_TABLE = "reviews_title_fts"
+
+INSTALL_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, description ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+UNINSTALL_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def is_supported(using=connection):
+    return using.vendor == "sqlite"
+
+
+def install_search_index(using=connection):
+    """Создает индекс и триггеры, если их нет (например, после
+    миграции, пересоздавшей таблицу reviews_title)."""
+    with using.cursor() as cursor:
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+
+
+def uninstall_search_index(using=connection):
+    with using.cursor() as cursor:
+        for sql in UNINSTALL_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_search_index(using=connection):
+    install_search_index(using)
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def match_expression(query):
+    """Превращает ввод пользователя в безопасный запрос MATCH.
+
+    Каждое слово ищется как префикс, все слова должны встретиться.
+    """
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_titles(queryset, query, rank=True):
+    """Фильтрует произведения по запросу и сортирует по bm25.
+
+    С rank=False только фильтрует через id__in: такой queryset можно
+    использовать как подзапрос, а join с индексом в подзапросе
+    ссылается на таблицу, которой там нет под этим именем.
+    """
+    match = match_expression(query)
+    if not match:
+        return queryset.none()
+    if not is_supported():
+        return queryset.filter(name__icontains=query)
+    if not rank:
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [match],
+            )
+        )
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f"{FTS_TABLE} MATCH %s",
+            f"{FTS_TABLE}.rowid = reviews_title.id",
+        ],
+        params=[match],
+        select={"search_rank": f"bm25({FTS_TABLE})"},
+        order_by=["search_rank"],
+    )
@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Review
+from .ratings import change_rating, refresh_rating
+
+# Отправляется после загрузки csv в модель (sender): bulk_create не
+# отправляет post_save, а кеши и индексы должны узнать о новых строках.
+csv_imported = Signal()
+
+
+def remember_score(instance):
+    # Отложенные (.only()/.defer()) поля не читаем, чтобы не делать запрос.
+    instance._saved_title_id = instance.__dict__.get("title_id")
+    instance._saved_score = instance.__dict__.get("score")
+
+
+@receiver(post_init, sender=Review)
+def review_loaded(sender, instance, **kwargs):
+    remember_score(instance)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    old_title_id = instance._saved_title_id
+    old_score = instance._saved_score
+    if created:
+        change_rating(instance.title_id, instance.score, 1)
+    elif old_title_id is None or old_score is None:
+        refresh_rating(instance.title_id)
+    elif old_title_id != instance.title_id:
+        change_rating(old_title_id, -old_score, -1)
+        change_rating(instance.title_id, instance.score, 1)
+    elif old_score != instance.score:
+        change_rating(instance.title_id, instance.score - old_score, 0)
+    remember_score(instance)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    if instance._saved_title_id is None or instance._saved_score is None:
+        refresh_rating(instance.title_id)
+    else:
+        change_rating(instance._saved_title_id, -instance._saved_score, -1)
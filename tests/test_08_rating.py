@@ -0,0 +1,43 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from .common import create_reviews
+
+
+class Test08Rating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_reviews(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title = Title.objects.get(id=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что при создании отзыва обновляются `rating_sum` и `rating_count` произведения'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        user.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (4, 1), (
+            'Проверьте, что при удалении отзыва (в том числе каскадном) рейтинг произведения пересчитывается'
+        )
+        assert title.rating == Review.objects.get(title=title).score
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recalculate_ratings_command(self, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        call_command('recalculate_ratings', '--check')
+
+        Title.objects.filter(id=titles[0]['id']).update(rating_sum=0, rating_count=0)
+        with pytest.raises(CommandError):
+            call_command('recalculate_ratings', '--check')
+
+        call_command('recalculate_ratings')
+        title = Title.objects.get(id=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что команда `recalculate_ratings` восстанавливает рейтинг по отзывам'
+        )
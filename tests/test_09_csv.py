@@ -0,0 +1,108 @@
+import pytest
+from django.core.management import call_command
+
+CSV_FILES = (
+    ('users.csv', 'User'),
+    ('category.csv', 'Category'),
+    ('genre.csv', 'Genre'),
+    ('titles.csv', 'Title'),
+    ('genre_title.csv', 'GenreTitle'),
+    ('review.csv', 'Review'),
+    ('comments.csv', 'Comment'),
+)
+
+
+def count_csv_rows(file_name):
+    import csv
+    import os
+
+    from django.conf import settings
+
+    path = os.path.join(settings.BASE_DIR, 'static/data', file_name)
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        return sum(1 for _ in csv.reader(csv_file)) - 1
+
+
+class Test09CSV:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_csv(self):
+        from django.apps import apps
+
+        for file_name, model_name in CSV_FILES:
+            call_command('import_csv', file_name=file_name, model_name=model_name, chunk_size=7)
+            model = apps.get_model('reviews', model_name)
+            assert model.objects.count() == count_csv_rows(file_name), (
+                f'Проверьте, что команда `import_csv` загружает все строки файла `{file_name}`'
+            )
+        call_command('recalculate_ratings', '--check')
+
+        call_command('import_csv', file_name='review.csv', model_name='Review')
+        assert apps.get_model('reviews', 'Review').objects.count() == count_csv_rows('review.csv'), (
+            'Проверьте, что повторный запуск `import_csv` не создает дубликаты'
+        )
+
+        import os
+
+        from django.conf import settings
+
+        from reviews.importers import import_csv
+        from reviews.models import Review
+
+        path = os.path.join(settings.BASE_DIR, 'static/data', 'review.csv')
+        assert import_csv(Review, path) == (0, 0), (
+            'Проверьте, что `import_csv` не считает записанными строки, которые уже были в базе'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_import_all(self):
+        from django.apps import apps
+
+        call_command('import_all', chunk_size=10)
+        for file_name, model_name in CSV_FILES:
+            model = apps.get_model('reviews', model_name)
+            assert model.objects.count() == count_csv_rows(file_name), (
+                f'Проверьте, что команда `import_all` загружает все строки файла `{file_name}`'
+            )
+        call_command('recalculate_ratings', '--check')
+
+    @pytest.mark.parametrize('compress', [False, True])
+    @pytest.mark.django_db(transaction=True)
+    def test_03_export_round_trip(self, tmp_path, compress):
+        from django.apps import apps
+
+        from reviews.models import Title, User
+
+        call_command('import_all')
+        Title.objects.filter(id=1).update(description='Описание, с "кавычками"\nи переносом')
+        User.objects.create_superuser(
+            username='root', email='root@yamdb.fake', password='1234567', role='admin'
+        )
+        User.objects.filter(id=100).update(is_active=False)
+        models = [apps.get_model('reviews', model_name) for _, model_name in CSV_FILES]
+
+        def snapshot():
+            return {
+                model: list(model.objects.order_by('id').values_list(
+                    *[field.attname for field in model._meta.concrete_fields
+                      if field.name not in ('last_login', 'date_joined')]
+                ))
+                for model in models
+            }
+
+        before = snapshot()
+        call_command('export_csv', data_dir=str(tmp_path), gzip=compress, chunk_size=7)
+        suffix = '.gz' if compress else ''
+        assert (tmp_path / f'titles.csv{suffix}').exists()
+        for model in reversed(models):
+            model.objects.all().delete()
+
+        call_command('import_all', data_dir=str(tmp_path))
+        after = snapshot()
+        for model in models:
+            assert after[model] == before[model], (
+                f'Проверьте, что повторный импорт выгрузки `export_csv` восстанавливает модель {model.__name__}'
+            )
+        assert User.objects.get(username='root').check_password('1234567'), (
+            'Проверьте, что `export_csv` сохраняет хеш пароля и флаги суперпользователя'
+        )
@@ -0,0 +1,314 @@
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+class Test10Queries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_constant_queries(self, client, admin_client, django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        for _ in range(3):
+            create_titles(admin_client)
+
+        from api.v1.indexes import CATEGORIES, GENRES
+
+        CATEGORIES.get()
+        GENRES.get()
+        # count, произведения, связи с жанрами; справочники уже в памяти
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == 5
+        assert all(len(title['genre']) for title in response.json()['results']), (
+            'Проверьте, что при GET запросе `/api/v1/titles/` возвращаются жанры произведений'
+        )
+
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['category']['slug'] == titles[0]['category']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comments_reject_foreign_title(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/')
+        assert response.status_code == 404, (
+            'Проверьте, что `/api/v1/titles/{title_id}/reviews/{review_id}/comments/` возвращает 404, '
+            'если отзыв относится к другому произведению'
+        )
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/')
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('page_size', [5, 50, 500])
+    @pytest.mark.django_db(transaction=True)
+    def test_03_reviews_comments_authors_joined(self, client, monkeypatch, django_assert_num_queries, page_size):
+        from rest_framework.pagination import PageNumberPagination
+
+        from reviews.models import Comment, Review, Title, User
+
+        monkeypatch.setattr(PageNumberPagination, 'page_size', page_size)
+        title = Title.objects.create(name='Произведение', year=2000)
+        User.objects.bulk_create(
+            User(username=f'author{i}', email=f'author{i}@yamdb.fake') for i in range(page_size)
+        )
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='text', score=5) for author in User.objects.all()
+        )
+        review = Review.objects.first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='text') for author in User.objects.all()
+        )
+
+        # родительский объект, count, страница вместе с авторами
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert len(response.json()['results']) == page_size
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/')
+        assert len(response.json()['results']) == page_size
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_reviews_cursor_pagination(self, client, django_assert_num_queries):
+        from reviews.models import Review, Title, User
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        User.objects.bulk_create(
+            User(username=f'author{i}', email=f'author{i}@yamdb.fake') for i in range(7)
+        )
+        for author in User.objects.all():
+            Review.objects.create(title=title, author=author, text='text', score=5)
+
+        # родительский объект и страница, без COUNT(*)
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/?cursor=')
+        data = response.json()
+        assert 'count' not in data and data['next'], (
+            'Проверьте, что параметр `cursor` включает курсорную пагинацию отзывов'
+        )
+        next_page = client.get(data['next']).json()
+        ids = [review['id'] for review in data['results'] + next_page['results']]
+        expected = list(Review.objects.order_by('-pub_date', '-id').values_list('id', flat=True))
+        assert ids == expected, (
+            'Проверьте, что курсорная пагинация отдает отзывы по убыванию `pub_date` без пропусков'
+        )
+        assert 'count' in client.get(f'/api/v1/titles/{title.id}/reviews/').json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_titles_facet_filters(self, client, admin_client, django_assert_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        data = {'name': 'Третий', 'year': 2000, 'genre': [genres[0]['slug']], 'category': categories[1]['slug']}
+        third_id = admin_client.post('/api/v1/titles/', data=data).json()['id']
+
+        cases = {
+            '?genre=horror': [titles[0]['id'], third_id],
+            '?genre=horror&year=2000': [titles[0]['id'], third_id],
+            '?genre=horror&category=books': [third_id],
+            '?genre=drama&year=2000': [],
+            '?category=unknown': [],
+            '?genre=': [titles[0]['id'], titles[1]['id'], third_id],
+            '?category=': [titles[0]['id'], titles[1]['id'], third_id],
+            '?genre=&year=2000': [titles[0]['id'], third_id],
+        }
+        client.get('/api/v1/titles/?genre=comedy')
+        for query, expected in cases.items():
+            # страница произведений и prefetch жанров; count - по индексу
+            with django_assert_num_queries(2 if expected else 0):
+                response = client.get(f'/api/v1/titles/{query}')
+            data = response.json()
+            assert [title['id'] for title in data['results']] == expected, (
+                f'Проверьте фильтрацию `/api/v1/titles/{query}`'
+            )
+            assert data['count'] == len(expected)
+
+        admin_client.patch(f'/api/v1/titles/{third_id}/', data={'genre': ['drama']})
+        response = client.get('/api/v1/titles/?genre=horror&category=books')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что индекс фильтров обновляется при изменении жанров произведения'
+        )
+        response = client.get('/api/v1/titles/?year=abc')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_titles_facet_counts(self, client, admin_client, django_assert_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/facets/'
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{url}` доступен без авторизации'
+        )
+        data = response.json()
+        assert data['count'] == 2
+        assert {item['slug']: item['count'] for item in data['genre']} == {'horror': 1, 'comedy': 1, 'drama': 1}, (
+            f'Проверьте, что `{url}` возвращает количество произведений по жанрам'
+        )
+        assert data['category'][0]['name'] in ('Фильм', 'Книги')
+        assert sorted(item['year'] for item in data['year']) == [2000, 2020]
+
+        with django_assert_num_queries(0):
+            data = client.get(url, {'genre': 'horror'}).json()
+        assert data['count'] == 1
+        assert data['category'] == [{'slug': 'films', 'name': 'Фильм', 'count': 1}], (
+            f'Проверьте, что `{url}` учитывает фильтры списка произведений'
+        )
+
+        assert client.get(url, {'genre': ''}).json()['count'] == 2, (
+            f'Проверьте, что `{url}` игнорирует пустые значения фильтров'
+        )
+
+        data = client.get(url, {'name': 'Проект'}).json()
+        assert data['count'] == 1 and data['year'] == [{'year': 2020, 'count': 1}], (
+            f'Проверьте, что `{url}` поддерживает фильтр `name`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_review_unique_by_database(self, user_client, admin_client, user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data=data)
+        assert response.status_code == 201
+        review_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_review"' in query['sql']
+        ]
+        assert not review_queries, (
+            'Проверьте, что перед созданием отзыва не выполняется проверка уникальности запросом'
+        )
+
+        response = user_client.post(url, data=data)
+        assert response.status_code == 400 and 'non_field_errors' in response.json(), (
+            'Проверьте, что повторный отзыв отклоняется ограничением базы с ответом 400'
+        )
+        assert Review.objects.filter(title=title, author=user).count() == 1
+
+        data = {'name': 'Фильм', 'slug': 'films'}
+        admin_client.post('/api/v1/categories/', data=data)
+        response = admin_client.post('/api/v1/categories/', data=data)
+        assert response.status_code == 400 and 'slug' in response.json(), (
+            'Проверьте, что повторный slug категории возвращает ошибку поля `slug`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_title_genres_batched(self, admin_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Category, Genre, GenreTitle
+
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.bulk_create(Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(10))
+        admin_client.get('/api/v1/users/me/')  # пользователь попадает в кеш
+
+        counts = []
+        for genres in (['genre-0'], [f'genre-{i}' for i in range(10)]):
+            data = {'name': 'Произведение', 'year': 2000, 'genre': genres, 'category': 'films'}
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post('/api/v1/titles/', data=data)
+            assert response.status_code == 201
+            assert sorted(response.json()['genre']) == sorted(genres)
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что число запросов при создании произведения не зависит от числа жанров'
+        )
+        assert GenreTitle.objects.count() == 11
+
+        title_id = response.json()['id']
+        response = admin_client.patch(f'/api/v1/titles/{title_id}/', data={'genre': ['genre-0', 'genre-11']})
+        assert response.status_code == 400
+        message = str(response.json()['genre'])
+        assert 'genre-11' in message, (
+            'Проверьте, что в ответе перечислены все неизвестные slug жанров'
+        )
+        response = admin_client.patch(f'/api/v1/titles/{title_id}/', data={'genre': ['genre-0', 'genre-1']})
+        assert sorted(response.json()['genre']) == ['genre-0', 'genre-1']
+        assert GenreTitle.objects.filter(title_id=title_id).count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_09_catalog_from_memory(self, client, admin_client, django_assert_num_queries):
+        from api.v1.indexes import CATEGORIES
+
+        for name, slug in (('Фильм', 'films'), ('Книга', 'books'), ('Фильм ужасов', 'horror-films')):
+            admin_client.post('/api/v1/categories/', data={'name': name, 'slug': slug})
+        CATEGORIES.get()
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/categories/', {'search': 'фильм'})
+        assert [item['slug'] for item in response.json()['results']] == ['films', 'horror-films'], (
+            'Проверьте, что поиск категорий без учета регистра отдается из памяти без запросов к базе'
+        )
+
+        admin_client.delete('/api/v1/categories/films/')
+        response = client.get('/api/v1/categories/')
+        assert [item['slug'] for item in response.json()['results']] == ['books', 'horror-films'], (
+            'Проверьте, что удаление категории сбрасывает снимок справочника'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_10_catalog_sees_writes_without_signals(self, client, settings, monkeypatch):
+        from django.core.management import call_command
+
+        from api.v1.indexes import CATEGORIES, GENRES, CatalogIndex
+        from reviews.models import Category, Genre, GenreTitle, Title
+
+        CATEGORIES.get()
+        GENRES.get()
+        Category.objects.bulk_create([Category(name='Фильм', slug='films')])
+        Genre.objects.bulk_create([Genre(name='Драма', slug='drama')])
+        title = Title.objects.create(name='Произведение', year=2000, category=Category.objects.get())
+        GenreTitle.objects.create(title=title, genre=Genre.objects.get())
+        data = client.get(f'/api/v1/titles/{title.id}/').json()
+        assert data['category'] == {'name': 'Фильм', 'slug': 'films'}, (
+            'Проверьте, что категория, записанная в обход сигналов, находится в снимке справочника'
+        )
+        assert data['genre'] == [{'name': 'Драма', 'slug': 'drama'}]
+
+        Genre.objects.bulk_create([Genre(name='Комедия', slug='comedy')])
+        assert len(client.get('/api/v1/genres/', {'page': 1}).json()['results']) == 1
+        settings.API_INDEX_MAX_AGE = 0
+        assert len(client.get('/api/v1/genres/', {'search': ''}).json()['results']) == 2, (
+            'Проверьте, что снимок справочника перестраивается по истечении API_INDEX_MAX_AGE'
+        )
+        settings.API_INDEX_MAX_AGE = 300
+
+        CATEGORIES.get()
+        call_command('import_csv', file_name='category.csv', model_name='Category')
+        assert client.get('/api/v1/categories/', {'page': 1}).json()['count'] > 1, (
+            'Проверьте, что импорт csv сбрасывает снимки справочников'
+        )
+
+        calls = []
+        get = CatalogIndex.get
+        monkeypatch.setattr(CatalogIndex, 'get', lambda index: calls.append(index) or get(index))
+        for i in range(4):
+            other = Title.objects.create(name=f'Другое {i}', year=2000, category=title.category)
+            GenreTitle.objects.create(title=other, genre=Genre.objects.get(slug='drama'))
+        assert len(client.get('/api/v1/titles/', {'page': 1}).json()['results']) == 5
+        assert len(calls) == 2, (
+            'Проверьте, что снимки справочников берутся один раз на сериализацию списка'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_11_explain_queries_seed_and_compare(self, capsys):
+        from django.core.management import call_command
+        from django.db import connection
+
+        from reviews.models import Comment, Review, Title
+
+        call_command('explain_queries', seed=2500, compare=True, repeat=1)
+        output = capsys.readouterr().out
+        assert Review.objects.count() == 2500 and Title.objects.count() == 3, (
+            'Проверьте, что `explain_queries --seed` создает заданное количество отзывов'
+        )
+        assert Comment.objects.count() == 250
+        assert 'С индексами' in output and 'Без индексов' in output, (
+            'Проверьте, что `explain_queries --compare` печатает планы с индексами и без них'
+        )
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Review._meta.db_table)
+        assert 'review_title_pub_date_idx' in constraints, (
+            'Проверьте, что `explain_queries --compare` восстанавливает индексы после замера'
+        )
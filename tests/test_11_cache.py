@@ -0,0 +1,119 @@
+import pytest
+
+from .common import auth_client, create_reviews, create_titles
+
+
+class Test11Cache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_served_from_cache(self, client, admin_client, django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        with django_assert_num_queries(0):
+            cached = client.get('/api/v1/titles/')
+        assert cached.json() == response.json(), (
+            'Проверьте, что повторный GET запрос `/api/v1/titles/` отдается из кеша'
+        )
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        with django_assert_num_queries(0):
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+
+        response = client.get('/api/v1/titles/?year=2020')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что query string входит в ключ кеша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cache_invalidated_on_write(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(title_url).json()['rating'] == 4
+        client.get(f'{title_url}reviews/')
+
+        auth_client(user).patch(f'{title_url}reviews/{reviews[1]["id"]}/', data={'score': 9})
+        assert client.get(title_url).json()['rating'] == 6, (
+            'Проверьте, что изменение отзыва сбрасывает кеш рейтинга произведения'
+        )
+        response = client.get(f'{title_url}reviews/{reviews[1]["id"]}/')
+        assert response.json()['score'] == 9
+
+        response = client.get('/api/v1/categories/')
+        admin_client.post('/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'})
+        assert client.get('/api/v1/categories/').json()['count'] == response.json()['count'] + 1, (
+            'Проверьте, что создание категории сбрасывает кеш `/api/v1/categories/`'
+        )
+        admin_client.patch(title_url, data={'genre': ['drama']})
+        assert [genre['slug'] for genre in client.get(title_url).json()['genre']] == ['drama'], (
+            'Проверьте, что изменение жанров произведения сбрасывает кеш'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_conditional_get(self, client, admin_client, admin, django_assert_num_queries):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag, f'Проверьте, что GET запрос `{url}` возвращает заголовок ETag'
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадении If-None-Match возвращается статус 304'
+        )
+        assert not response.content
+
+        admin_client.post(url, data={'text': 'new'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после изменения данных ETag меняется'
+        )
+        assert response['ETag'] != etag
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_invalidated_after_commit(self):
+        from django.db import transaction
+
+        from api.v1.cache import get_version
+        from reviews.models import Category
+
+        before = get_version('categories')
+        with transaction.atomic():
+            Category.objects.create(name='Фильм', slug='films')
+            assert get_version('categories') == before, (
+                'Проверьте, что версия кеша не меняется до коммита транзакции'
+            )
+        assert get_version('categories') != before, (
+            'Проверьте, что версия кеша меняется после коммита транзакции'
+        )
+
+        before = get_version('categories')
+        try:
+            with transaction.atomic():
+                Category.objects.create(name='Книга', slug='books')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        assert get_version('categories') == before
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_author_rename_invalidates(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+
+        auth_client(user).patch('/api/v1/users/me/', data={'username': 'renamed'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что смена username автора сбрасывает кеш отзывов'
+        )
+        assert 'renamed' in [review['author'] for review in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_if_none_match_star(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get('/api/v1/titles/999999/', HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == 404, (
+            'Проверьте, что If-None-Match: * не скрывает ответ 404'
+        )
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/', HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == 200 and response['ETag']
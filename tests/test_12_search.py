@@ -0,0 +1,102 @@
+import pytest
+
+from .common import auth_client, create_titles, create_users_api
+
+
+class Test12Search:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_full_text_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get('/api/v1/titles/?search=поворот')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что `?search=` ищет произведения по названию без учета регистра'
+        )
+        response = client.get('/api/v1/titles/?search=драма год')
+        assert [title['id'] for title in response.json()['results']] == [titles[1]['id']], (
+            'Проверьте, что `?search=` ищет по описанию и по префиксам слов'
+        )
+        response = client.get('/api/v1/titles/?search=проект&category=films')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что `?search=` сочетается с остальными фильтрами'
+        )
+
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Сюжет'})
+        assert client.get('/api/v1/titles/?search=проект').json()['count'] == 0
+        assert client.get('/api/v1/titles/?search=сюжет').json()['count'] == 1, (
+            'Проверьте, что индекс поиска обновляется при изменении произведения'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert client.get('/api/v1/titles/?search=сюжет').json()['count'] == 0
+        assert client.get('/api/v1/titles/?search="*').json()['count'] == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_fuzzy_search(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get('/api/v1/titles/?q=пворот туад')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что `?q=` находит произведения по названию с опечатками'
+        )
+        response = client.get('/api/v1/genres/?q=комедя')
+        assert [genre['slug'] for genre in response.json()['results']] == ['comedy'], (
+            'Проверьте, что `?q=` находит жанры по названию с опечатками'
+        )
+        response = client.get('/api/v1/categories/?q=книгии')
+        assert [category['slug'] for category in response.json()['results']] == ['books'], (
+            'Проверьте, что `?q=` находит категории по названию с опечатками'
+        )
+
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Поворот обратно'})
+        response = client.get('/api/v1/titles/?q=поворот')
+        assert len(response.json()['results']) == 2, (
+            'Проверьте, что индекс `?q=` обновляется при изменении произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_autocomplete(self, client, admin_client, admin, django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        data = {'name': 'Повар', 'year': 2001, 'genre': ['drama'], 'category': 'films'}
+        cook_id = admin_client.post('/api/v1/titles/', data=data).json()['id']
+        url = '/api/v1/titles/autocomplete/'
+        response = client.get(url, {'prefix': 'пов'})
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{url}` доступен без авторизации'
+        )
+        assert {item['id'] for item in response.json()} == {titles[0]['id'], cook_id}, (
+            f'Проверьте, что `{url}` возвращает произведения с заданным префиксом'
+        )
+
+        user, _ = create_users_api(admin_client)
+        auth_client(user).post(f'/api/v1/titles/{cook_id}/reviews/', data={'text': 'ок', 'score': 7})
+        with django_assert_num_queries(0):
+            response = client.get(url, {'prefix': 'ПОВ', 'limit': 1})
+        assert response.json() == [{'id': cook_id, 'name': 'Повар'}], (
+            f'Проверьте, что `{url}` сортирует произведения по числу отзывов'
+        )
+
+        admin_client.patch(f'/api/v1/titles/{cook_id}/', data={'name': 'Кок'})
+        assert [item['id'] for item in client.get(url, {'prefix': 'пов'}).json()] == [titles[0]['id']]
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert client.get(url, {'prefix': 'пов'}).json() == [], (
+            f'Проверьте, что `{url}` учитывает изменение и удаление произведений'
+        )
+        assert client.get(url, {'limit': 0}).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_autocomplete_sees_foreign_changes(self):
+        from api.v1.cache import invalidate
+        from api.v1.indexes import TITLE_PREFIXES
+        from reviews.models import Title
+
+        alpha = Title.objects.create(name='Alpha', year=2000)
+        Title.objects.create(name='Beta', year=2000)
+        assert TITLE_PREFIXES.complete('al', 5) == [(alpha.id, 'Alpha')]
+
+        # Переименование в другом процессе: сигналы этого процесса не вызываются.
+        Title.objects.filter(id=alpha.id).update(name='Gamma')
+        invalidate('title_names')
+        Title.objects.create(name='Delta', year=2000)
+        assert TITLE_PREFIXES.complete('al', 5) == [], (
+            'Проверьте, что локальная запись не закрепляет устаревший индекс автодополнения'
+        )
+        assert TITLE_PREFIXES.complete('ga', 5) == [(alpha.id, 'Gamma')]
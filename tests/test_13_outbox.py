@@ -0,0 +1,53 @@
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+
+class Test13Outbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queues_email(self, client):
+        from reviews.models import OutgoingEmail
+
+        data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        client.post(self.url_signup, data=data)
+        assert len(mail.outbox) == 0, (
+            f'Проверьте, что `{self.url_signup}` не отправляет письмо в запросе, а ставит его в очередь'
+        )
+        client.post(self.url_signup, data=data)
+        assert OutgoingEmail.objects.filter(sent__isnull=True).count() == 1, (
+            'Проверьте, что повторный код на тот же адрес заменяет неотправленное письмо'
+        )
+
+        call_command('process_outbox')
+        assert [message.to for message in mail.outbox] == [[data['email']]]
+        call_command('process_outbox')
+        assert len(mail.outbox) == 1, 'Проверьте, что письмо отправляется один раз'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_failed_delivery_is_retried(self, monkeypatch):
+        from django.core.mail.backends.locmem import EmailBackend
+
+        from reviews.models import OutgoingEmail
+        from reviews.outbox import queue_email
+
+        queue_email('first@yamdb.fake', 'Тема', 'Текст')
+        queue_email('second@yamdb.fake', 'Тема', 'Текст')
+
+        def broken(self, messages):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', broken)
+        call_command('process_outbox', max_attempts=2)
+        call_command('process_outbox', max_attempts=2)
+        call_command('process_outbox', max_attempts=2)
+        assert set(OutgoingEmail.objects.values_list('attempts', flat=True)) == {2}, (
+            'Проверьте, что неудачная отправка увеличивает счетчик попыток до `max_attempts`'
+        )
+        assert OutgoingEmail.objects.first().error == 'SMTP недоступен'
+
+        monkeypatch.undo()
+        call_command('process_outbox', max_attempts=3)
+        assert len(mail.outbox) == 2
+        assert not OutgoingEmail.objects.filter(sent__isnull=True).exists()
@@ -0,0 +1,97 @@
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Test14Authentication:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_token_claims(self, client, user):
+        from django.contrib.auth.tokens import default_token_generator
+
+        code = default_token_generator.make_token(user)
+        response = client.post('/api/v1/auth/token/', data={'username': user.username, 'confirmation_code': code})
+        token = AccessToken(response.json()['token'])
+        assert (token['username'], token['role']) == (user.username, user.role), (
+            'Проверьте, что токен содержит `username` и `role` пользователя'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_user_loaded_once(self, user_client, admin_client, user, django_assert_num_queries):
+        user_client.get('/api/v1/users/me/')
+        with django_assert_num_queries(0):
+            response = user_client.get('/api/v1/users/me/')
+        assert response.json()['role'] == 'user', (
+            'Проверьте, что повторный запрос с тем же токеном не загружает пользователя из базы'
+        )
+
+        data = {'name': 'Музыка', 'slug': 'music'}
+        assert user_client.post('/api/v1/categories/', data=data).status_code == 403
+        admin_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        assert user_client.post('/api/v1/categories/', data=data).status_code == 201, (
+            'Проверьте, что смена роли пользователя сразу учитывается при авторизации'
+        )
+
+        user.delete()
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что токен удаленного пользователя перестает действовать'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_throttling(self, client, user_client, monkeypatch):
+        from api.v1.throttling import SignupRateThrottle, WriteRateThrottle
+
+        from reviews.models import Title
+
+        monkeypatch.setattr(SignupRateThrottle, 'rate', '2/hour', raising=False)
+        monkeypatch.setattr(WriteRateThrottle, 'rate', '1/min', raising=False)
+        for i in range(2):
+            client.post('/api/v1/auth/signup/', data={'email': f'u{i}@yamdb.fake', 'username': f'u{i}'})
+        response = client.post('/api/v1/auth/signup/', data={'email': 'u3@yamdb.fake', 'username': 'u3'})
+        assert response.status_code == 429, (
+            'Проверьте, что частые запросы к `/api/v1/auth/signup/` ограничиваются'
+        )
+        assert int(response['Retry-After']) > 0, 'Проверьте, что ответ 429 содержит заголовок Retry-After'
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert user_client.post(url, data={'text': 'text', 'score': 5}).status_code == 201
+        assert user_client.get(url).status_code == 200
+        assert user_client.post(url, data={'text': 'text', 'score': 5}).status_code == 429, (
+            'Проверьте, что создание отзывов ограничивается по пользователю'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_snapshot_expires(self, user_client, user, monkeypatch):
+        from api.v1.authentication import USER_SNAPSHOTS
+        from reviews.models import User
+
+        user_client.get('/api/v1/users/me/')
+        # Смена роли в другом процессе с несвязанным кешем: версия не меняется.
+        User.objects.filter(id=user.id).update(role='admin')
+        assert user_client.get('/api/v1/users/me/').json()['role'] == 'user'
+
+        monkeypatch.setattr(USER_SNAPSHOTS, 'max_age', 0)
+        response = user_client.get('/api/v1/users/me/')
+        assert response.json()['role'] == 'admin', (
+            'Проверьте, что снимок пользователя загружается заново по истечении USER_CACHE_MAX_AGE'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_throttling_authenticated(self, user_client, monkeypatch):
+        from api.v1.throttling import SignupRateThrottle, TokenRateThrottle
+
+        monkeypatch.setattr(SignupRateThrottle, 'rate', '2/hour', raising=False)
+        monkeypatch.setattr(TokenRateThrottle, 'rate', '2/hour', raising=False)
+        for i in range(2):
+            user_client.post('/api/v1/auth/signup/', data={'email': f'u{i}@yamdb.fake', 'username': f'u{i}'})
+        response = user_client.post('/api/v1/auth/signup/', data={'email': 'u3@yamdb.fake', 'username': 'u3'})
+        assert response.status_code == 429, (
+            'Проверьте, что ограничение `/api/v1/auth/signup/` действует и для запросов с токеном'
+        )
+
+        data = {'username': 'u0', 'confirmation_code': 'wrong'}
+        for _ in range(2):
+            user_client.post('/api/v1/auth/token/', data=data)
+        assert user_client.post('/api/v1/auth/token/', data=data).status_code == 429, (
+            'Проверьте, что ограничение `/api/v1/auth/token/` действует и для запросов с токеном'
+        )
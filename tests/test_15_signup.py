@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class Test15Signup:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_single_insert(self, client):
+        data = {'username': 'Quick', 'email': 'quick@yamdb.fake'}
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200
+        user_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'reviews_user' in query['sql']
+        ]
+        assert len(user_queries) == 1 and user_queries[0].startswith('INSERT'), (
+            'Проверьте, что регистрация нового пользователя выполняет '
+            'один INSERT без предварительных SELECT'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_case_insensitive_duplicates(self, client, django_user_model):
+        data = {'username': 'Quick', 'email': 'quick@yamdb.fake'}
+        client.post(self.url_signup, data=data)
+
+        response = client.post(self.url_signup, data={'username': 'QUICK', 'email': 'other@yamdb.fake'})
+        assert response.status_code == 400 and 'username' in response.json(), (
+            'Проверьте, что username уникален без учета регистра'
+        )
+        response = client.post(self.url_signup, data={'username': 'other', 'email': 'Quick@YaMDb.fake'})
+        assert response.status_code == 400 and 'email' in response.json(), (
+            'Проверьте, что email уникален без учета регистра'
+        )
+        assert django_user_model.objects.count() == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_repeat_signup(self, client, django_user_model):
+        data = {'username': 'Quick', 'email': 'quick@yamdb.fake'}
+        client.post(self.url_signup, data=data)
+        response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200 and response.json() == data, (
+            'Проверьте, что повторная регистрация с теми же данными '
+            'заново отправляет код подтверждения'
+        )
+        assert django_user_model.objects.count() == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_patch_own_username(self, user_client, admin_client, user):
+        data = {'username': user.username, 'email': user.email.upper()}
+        response = user_client.patch('/api/v1/users/me/', data=data)
+        assert response.status_code == 200, (
+            'Проверьте, что свои username и email не считаются занятыми '
+            'при изменении `/api/v1/users/me/`'
+        )
+        response = admin_client.patch(f'/api/v1/users/{user.username}/', data={'username': 'testuser'})
+        assert response.status_code == 200
+
+        response = admin_client.post('/api/v1/users/', data={'username': 'TESTUSER', 'email': 'other@yamdb.fake'})
+        assert response.status_code == 400 and 'username' in response.json(), (
+            'Проверьте, что username другого пользователя по-прежнему занят без учета регистра'
+        )
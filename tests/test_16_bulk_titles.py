@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class Test16BulkTitles:
+    url = '/api/v1/titles/bulk/'
+
+    def create_catalog(self):
+        from reviews.models import Category, Genre
+
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.bulk_create(Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(3))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_json(self, client, admin_client):
+        from reviews.models import GenreTitle, Title
+
+        self.create_catalog()
+        admin_client.get('/api/v1/users/me/')  # пользователь попадает в кеш
+        client.get('/api/v1/titles/', {'genre': 'genre-0'})
+        items = [
+            {'name': f'Произведение {i}', 'year': 1950 + i, 'genre': ['genre-0', f'genre-{i % 3}'], 'category': 'films'}
+            for i in range(50)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.url, data=json.dumps(items), content_type='application/json')
+        assert response.status_code == 201, (
+            f'Проверьте, что POST запрос `{self.url}` администратора создает произведения'
+        )
+        assert len(context.captured_queries) <= 7, (
+            'Проверьте, что число запросов при создании пачки не зависит от ее размера'
+        )
+        data = response.json()
+        assert [item['name'] for item in data] == [item['name'] for item in items]
+        assert Title.objects.count() == 50
+        title = Title.objects.get(id=data[1]['id'])
+        assert title.name == 'Произведение 1'
+        assert sorted(title.genre.values_list('slug', flat=True)) == ['genre-0', 'genre-1']
+        assert GenreTitle.objects.count() == 50 + 50 - 17
+        response = client.get('/api/v1/titles/', {'genre': 'genre-0'})
+        assert response.json()['count'] == 50, (
+            'Проверьте, что после создания пачки сбрасывается кеш произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_errors(self, client, user_client, admin_client):
+        from reviews.models import Title
+
+        self.create_catalog()
+        items = [
+            {'name': 'Произведение', 'year': 2000, 'genre': ['genre-0'], 'category': 'films'},
+            {'name': 'Произведение', 'year': 2000, 'genre': ['genre-0', 'unknown'], 'category': 'films'},
+            {'name': 'Произведение', 'year': 2000, 'genre': [], 'category': 'unknown'},
+        ]
+        assert user_client.post(self.url, data=json.dumps(items), content_type='application/json').status_code == 403
+        response = admin_client.post(self.url, data=json.dumps(items), content_type='application/json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {} and 'genre' in errors[1] and 'category' in errors[2], (
+            'Проверьте, что ответ 400 содержит ошибки каждого элемента в порядке запроса'
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибке в пачке не создается ни одно произведение'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_ndjson(self, admin_client):
+        from reviews.models import Title
+
+        self.create_catalog()
+        body = '\n'.join(
+            json.dumps({'name': f'Произведение {i}', 'year': 2000, 'genre': ['genre-1'], 'category': 'films'})
+            for i in range(3)
+        ) + '\n\n'
+        response = admin_client.post(self.url, data=body, content_type='application/x-ndjson')
+        assert response.status_code == 201, (
+            f'Проверьте, что `{self.url}` принимает NDJSON'
+        )
+        assert Title.objects.count() == 3
+        response = admin_client.post(self.url, data='{"name": ', content_type='application/x-ndjson')
+        assert response.status_code == 400
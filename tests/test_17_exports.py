@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+import pytest
+
+from .common import create_comments, create_titles
+
+
+def read_stream(response):
+    assert response.streaming, (
+        'Проверьте, что выгрузка отдается через StreamingHttpResponse'
+    )
+    return b''.join(response.streaming_content).decode()
+
+
+class Test17Exports:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_ndjson(self, client, user_client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/export/titles/'
+        assert client.get(url).status_code == 401
+        assert user_client.get(url).status_code == 403, (
+            f'Проверьте, что `{url}` доступен только администратору'
+        )
+
+        response = admin_client.get(url, {'category': 'films'})
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        expected = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()
+        assert rows == [expected], (
+            'Проверьте, что выгрузка учитывает фильтры произведений и совпадает с ответом API'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_comments_csv(self, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+
+        response = admin_client.get('/api/v1/export/reviews/', {'format': 'csv', 'year': 2000})
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert [(int(row['id']), int(row['title']), row['author']) for row in rows] == [
+            (review['id'], titles[0]['id'], review['author']) for review in reviews
+        ], (
+            'Проверьте, что выгрузка отзывов в CSV содержит поля ReviewSerializer и id произведения'
+        )
+        response = admin_client.get('/api/v1/export/reviews/', {'format': 'csv', 'year': 2020})
+        assert len(read_stream(response).splitlines()) == 1
+        response = admin_client.get('/api/v1/export/reviews/', {'search': 'Поворот'})
+        assert len(read_stream(response).splitlines()) == len(reviews), (
+            'Проверьте, что выгрузка отзывов поддерживает полнотекстовый поиск произведений'
+        )
+
+        response = admin_client.get('/api/v1/export/comments/', HTTP_ACCEPT='application/x-ndjson')
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [(row['id'], row['review'], row['text']) for row in rows] == [
+            (comment['id'], reviews[0]['id'], comment['text']) for comment in comments
+        ]
+        assert set(rows[0]) == {'id', 'text', 'author', 'pub_date', 'review'}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_titles_chunks(self, admin_client, settings, django_assert_num_queries):
+        from reviews.models import GenreTitle, Genre, Title
+
+        from api.v1.indexes import CATEGORIES, GENRES
+
+        settings.EXPORT_CHUNK_SIZE = 10
+        genre = Genre.objects.create(name='Жанр', slug='genre')
+        titles = Title.objects.bulk_create(Title(name=f'Произведение {i}', year=2000) for i in range(25))
+        GenreTitle.objects.bulk_create(GenreTitle(title=title, genre=genre) for title in Title.objects.all())
+        CATEGORIES.get()
+        GENRES.get()
+        admin_client.get('/api/v1/users/me/')
+
+        response = admin_client.get('/api/v1/export/titles/', {'format': 'csv'})
+        # по запросу жанров на каждую из трех пачек
+        with django_assert_num_queries(4):
+            rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert len(rows) == len(titles) and all(row['genre'] == 'genre' for row in rows), (
+            'Проверьте, что выгрузка читает произведения пачками и подгружает жанры'
+        )